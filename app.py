@@ -1,630 +1,563 @@
-import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-
-# --- Mapeo de columnas ---
-column_map = {
-    'Minutos jugados': 'Minutes played',
-    'Altura': 'Height',
-    'Edad': 'Age'
-}
-
-# --- Roles y métricas mediocampistas ---
-roles_metrics_mid = {
-    "Box Crashers": {
-        "Metrics": ["xG per 90", "xA", "Successful dribbles, %", "Dribbles per 90", "Touches in box per 90", "Progressive runs per 90"],
-        "Weights": [0.25, 0.2, 0.1, 0.15, 0.2, 0.1]
-    },
-    "Creator": {
-        "Metrics": ["Key passes per 90", "xG per 90", "xA", "Passes to final third per 90", "Progressive passes per 90", "Long passes per 90"],
-        "Weights": [0.3, 0.25, 0.2, 0.1, 0.1, 0.05]
-    },
-    "Orchestrator ": {
-        "Metrics": ["Passes per 90", "Accurate passes, %", "Short / medium passes per 90", "PAdj Interceptions", "Successful defensive actions per 90", "Key passes per 90", "Defensive duels won, %"],
-        "Weights": [0.25, 0.2, 0.15, 0.15, 0.1, 0.1, 0.05]
-    },
-    "Box to Box": {
-        "Metrics": ["Progressive passes per 90", "Defensive duels won, %", "PAdj Interceptions", "Successful defensive actions per 90", "xG per 90", "Received passes per 90"],
-        "Weights": [0.25, 0.2, 0.2, 0.15, 0.1, 0.1]
-    },
-    "Distributor": {
-        "Metrics": ["Passes per 90", "Accurate passes, %", "Forward passes per 90", "Accurate forward passes, %", "Passes to final third per 90", "Long passes per 90"],
-        "Weights": [0.25, 0.2, 0.2, 0.15, 0.1, 0.1]
-    },
-    "Builder": {
-        "Metrics": ["Passes per 90", "Accurate passes, %", "Defensive duels won, %", "Successful defensive actions per 90", "PAdj Interceptions", "Progressive passes per 90"],
-        "Weights": [0.3, 0.25, 0.15, 0.1, 0.15, 0.05]
-    },
-    "Defensive Mid": {
-        "Metrics": ["Defensive duels won, %", "Aerial duels won, %", "PAdj Sliding tackles", "PAdj Interceptions", "Successful defensive actions per 90"],
-        "Weights": [0.4, 0.1, 0.2, 0.2, 0.1]
-    }
-}
+import io
+from concurrent.futures import FIRST_COMPLETED, wait
+from functools import partial
 
-# --- Roles y métricas defensas centrales ---
-roles_metrics_cbs = {
-    "Ball playing CB": {
-        "Metrics": ["Accurate long passes, %", "Passes to final third per 90", "Deep completions per 90", "Progressive passes per 90",
-                    "Passes per 90", "Aerial duels won, %", "Defensive duels won, %"],
-        "Weights": [0.15, 0.2, 0.075, 0.15, 0.325, 0.05, 0.05]
-    },
-    "Defensive CB": {
-        "Metrics": ["Defensive duels won, %", "Aerial duels won, %", "PAdj Sliding tackles", "PAdj Interceptions",
-                    "Successful defensive actions per 90"],
-        "Weights": [0.3, 0.2, 0.2, 0.2, 0.1]
-    },
-    "Wide CB": {
-        "Metrics": ["Progressive passes per 90", "Progressive runs per 90", "Passes per 90", "Defensive duels won, %",
-                    "Accurate short / medium passes, %", "Accurate long passes, %"],
-        "Weights": [0.125, 0.275, 0.2, 0.2, 0.15, 0.05]
-    }
-}
+import numpy as np
+import streamlit as st
 
-roles_metrics_wingers = {
-    "Inverted Winger": {
-        "Metrics": ["Shots per 90", "xG per 90", "Touches in box per 90", "Successful dribbles, %", "Shot assists per 90", "Deep completed crosses per 90", "Accurate short / medium passes, %" ],
-        "Weights": [0.3, 0.15, 0.15, 0.15, 0.1, 0.1, 0.05]
+from best_role import best_role_matrix, pool_columns
+from datasets import (CACHE_DIR, CACHE_MAX_BYTES, DatasetCache, file_hash, load_dataset, load_scoring_session,
+                      load_store_session, read_imported, roles_hash)
+from profiling import StageRecorder
+from reports import REPORT_FORMATS, export_radars, radar_jobs
+from role_config import PlanLoader
+from roles import position_groups
+from scheduler import IngestPipeline, ScoringScheduler
+from scoring import dataset_columns, normalization_methods, shrinkage_modes, top_rows
+from similarity import similar_players
+from store import PlayerStore
+from tables import page_rows, style_page
+from trends import TrendHistory
+
+# --- Textos de la interfaz por grupo de posición ---
+ui_texts = {
+    "mid": {
+        "Uploader": "Sube archivo mediocampistas",
+        "Titulo": "Mediocampistas",
+        "Archivo": "mediocampistas",
+        "Jugadores": "jugadores",
+        "Uno": "un jugador",
+        "Rol radar": "Selecciona un rol para el radar",
     },
-    "Traditional Winger": {
-        "Metrics": ["Shot assists per 90", "Successful dribbles, %", "Deep completed crosses per 90", "Accelerations per 90", "xA" , "Accurate crosses, %"],
-        "Weights": [0.2, 0.175, 0.225, 0.2, 0.1, 0.1]
+    "cbs": {
+        "Uploader": "Sube archivo defensas centrales",
+        "Titulo": "Defensas Centrales",
+        "Archivo": "defensas centrales",
+        "Jugadores": "defensas centrales",
+        "Uno": "un defensa central",
+        "Rol radar": "Selecciona un rol para el radar (Defensas Centrales)",
     },
-    "Playmaking Winger": {
-        "Metrics": ["Key passes per 90", "Shot assists per 90","Passes to final third per 90", "Deep completions per 90", "Progressive passes per 90", "Smart passes per 90", "Second assists per 90", "Third assists per 90"],
-        "Weights": [0.25, 0.1, 0.1, 0.1, 0.15, 0.2, 0.05, 0.05]
+    "wingers": {
+        "Uploader": "Sube archivo extremos",
+        "Titulo": "Extremos",
+        "Archivo": "extremos",
+        "Jugadores": "extremos",
+        "Uno": "un extremo",
+        "Rol radar": "Selecciona un rol para el radar (Extremos)",
     },
-    "Inside Forward": {
-        "Metrics": ["Touches in box per 90", "xG per 90", "Progressive runs per 90", "Goals per 90","Successful dribbles, %", "Goal conversion, %", "xA"],
-        "Weights": [0.2, 0.2, 0.1, 0.15, 0.1, 0.1, 0.15]
-    }
-}
-
-roles_metrics_laterales = {
-    "Attacking FB": {
-        "Metrics": ["Passes to penalty area per 90", "Passes to final third per 90", "Progressive runs per 90", "Offensive duels won, %",
-                    "Successful dribbles, %", "xA per 90", "Accelerations per 90", "Accurate crosses, %"],
-        "Weights": [0.075, 0.075, 0.05, 0.325, 0.15, 0.1, 0.05, 0.1]
+    "laterales": {
+        "Uploader": "Sube archivo laterales",
+        "Titulo": "Laterales",
+        "Archivo": "laterales",
+        "Jugadores": "laterales",
+        "Uno": "un lateral",
+        "Rol radar": "Selecciona un rol para el radar (Laterales)",
     },
-    "Inverted FB": {
-        "Metrics": ["Passes per 90", "Smart passes per 90", "Through passes per 90", "Progressive passes per 90",
-                    "PAdj Sliding tackles", "PAdj Interceptions", "Short / medium passes per 90", "Defensive duels won, %"],
-        "Weights": [0.35, 0.075, 0.1, 0.2, 0.05, 0.05, 0.125, 0.05]
+    "delanteros": {
+        "Uploader": "Sube archivo de delanteros",
+        "Titulo": "Delanteros",
+        "Archivo": "delanteros",
+        "Jugadores": "delanteros",
+        "Uno": "un delantero",
+        "Rol radar": "Selecciona un rol para el radar (Delanteros)",
     },
-    "Defensive FB": {
-        "Metrics": ["Defensive duels won, %", "Aerial duels won, %", "PAdj Sliding tackles", "PAdj Interceptions"],
-        "Weights": [0.55, 0.15, 0.15, 0.15]
-    }
 }
 
-roles_metrics_delanteros = {
-
 
-    "Second Striker": {
-        "Metrics": ["xG per 90", "Touches in box per 90", "Non-penalty goals per 90", "xA", "Goal conversion, %", "Successful dribbles, %", "Progressive runs per 90" ],
-        "Weights": [0.2, 0.2, 0.15, 0.15, 0.1, 0.1, 0.1]
-    },
-    "Deep-Lying Striker": {
-        "Metrics": ["xG per 90", "Non-penalty goals per 90", "Deep completions per 90", "Received passes per 90", "Assists per 90" , "Shot assists per 90", "Second assists per 90", "Third assists per 90"],
-        "Weights": [0.125, 0.125, 0.15, 0.15, 0.15, 0.05, 0.025, 0.125]
-    },
-    "Target Man": {
-        "Metrics": ["Touches in box per 90", "Aerial duels won, %","xG per 90", "Shots on target, %", "Non-penalty goals per 90"],
-        "Weights": [0.1, 0.425, 0.225, 0.2, 0.05]
-    },
-    "Playmaking Striker": {
-        "Metrics": ["Short / medium passes per 90", "Received passes per 90", "Shot assists per 90", "Key passes per 90","xG per 90", "Non-penalty goals per 90", "Offensive duels won, %"],
-        "Weights": [0.25, 0.25, 0.1, 0.1, 0.1, 0.1, 0.1]
-    },
-    "Advanced Striker": {
-        "Metrics": ["Accelerations per 90", "Touches in box per 90", "Progressive runs per 90", "Goals per 90","xG per 90", "Goal conversion, %", "xA", "Successful dribbles, %"],
-        "Weights": [0.2, 0.1, 0.2, 0.1, 0.1, 0.1, 0.1, 0.1]
-    }
-}
+def stage(name, group=None):
+    # Etapa medida en el panel de depuración (no hace nada si está desactivado)
+    return st.session_state["recorder"].stage(name, group)
 
-# --- Diccionario con nombres, descripción y número típico de posición ---
-role_descriptions = {
-    "Box Crashers": {
-        "Nombre": "Interior Llegador",
-        "Descripción": "Mediocampista con alta capacidad de irrumpir en el área rival. Aporta en generación ofensiva, conducción y finalización.",
-        "Posición": "8 / 10"
-    },
-    "Creator": {
-        "Nombre": "Creador de Juego",
-        "Descripción": "Centrado en generar ocasiones de gol desde zonas avanzadas. Preciso en pases clave, visión ofensiva.",
-        "Posición": "10 / 8"
-    },
-    "Orchestrator ": {
-        "Nombre": "Organizador de Medio Campo",
-        "Descripción": "Controla el ritmo del partido. Distribuye el balón con precisión y colabora en tareas defensivas.",
-        "Posición": "6 / 8"
-    },
-    "Box to Box": {
-        "Nombre": "Volante Mixto",
-        "Descripción": "Participa tanto en defensa como en ataque. Recorre grandes distancias y tiene impacto en ambas áreas.",
-        "Posición": "8"
-    },
-    "Distributor": {
-        "Nombre": "Distribuidor de Juego",
-        "Descripción": "Especialista en circulación y distribución. Preciso en pases hacia el frente y cambios de orientación.",
-        "Posición": "6 / 8"
-    },
-    "Builder": {
-        "Nombre": "Constructor desde Atrás",
-        "Descripción": "Inicia la jugada desde zonas más retrasadas. Seguro con el balón y fuerte en tareas defensivas básicas.",
-        "Posición": "5 / 6"
-    },
-    "Defensive Mid": {
-        "Nombre": "Mediocentro Defensivo",
-        "Descripción": "Recuperador puro. Interrumpe el juego rival y protege la zona delante de la defensa.",
-        "Posición": "6"
-    }
-}
 
-def filter_players(df, filter_params):
-    for column, value in filter_params.items():
-        if column in df.columns:
-            if isinstance(value, tuple):
-                min_value, max_value = value
-                df = df[(df[column] >= min_value) & (df[column] <= max_value)]
-            else:
-                df = df[df[column] == value]
-    return df
-
-def normalize_series(series):
-    min_val, max_val = series.min(), series.max()
-    if max_val > min_val:
-        return (series - min_val) / (max_val - min_val) * 100
-    else:
-        return series * 0 + 50
-
-def calculate_score_all_roles_wide(df, roles_metrics):
-    df = df.copy()
-    df_final = df[['Player', 'Team', 'Position']].drop_duplicates().reset_index(drop=True)
-    
-    for role in roles_metrics.keys():
-        metrics = roles_metrics[role]["Metrics"]
-        weights = roles_metrics[role]["Weights"]
-        puntaje = pd.Series(0.0, index=df.index)
-        for metric, weight in zip(metrics, weights):
-            if metric in df.columns:
-                norm_metric = normalize_series(df[metric])
-                puntaje += norm_metric * weight
-        # Normalizamos puntaje final para el rol
-        puntaje_norm = normalize_series(puntaje)
-        df_final["Puntaje_" + role.strip()] = puntaje_norm.values
-
-    return df_final
-
-def highlight_scores(df):
+def highlight_scores(page, df):
+    # Degradado solo en la página visible, con los límites de la tabla completa
     score_cols = [col for col in df.columns if col.startswith("Puntaje_")]
-    return df.style.background_gradient(subset=score_cols, cmap='Greens')
+    return style_page(page, {col: (df[col].min(), df[col].max()) for col in score_cols})
+
+
+def render_score_table(group, df_score):
+    # La tabla se ordena y se pagina en el servidor; al navegador solo llega la página visible
+    score_cols = [col for col in df_score.columns if col.startswith("Puntaje_")]
+    sort_by = st.selectbox("Ordenar por", [None] + score_cols, key=f"orden_{group}",
+                           format_func=lambda col: "Orden del archivo" if col is None else col)
+    page_size = st.selectbox("Filas por página", [25, 50, 100, 250], index=1, key=f"filas_{group}")
+    n_pages = max(1, -(-len(df_score) // page_size))
+    if st.session_state.get(f"pagina_{group}", 1) > n_pages:
+        st.session_state[f"pagina_{group}"] = n_pages
+    page = st.number_input("Página", min_value=1, max_value=n_pages, step=1, key=f"pagina_{group}")
+
+    if sort_by is None:
+        rows = np.arange((page - 1) * page_size, min(page * page_size, len(df_score)))
+    else:
+        rows = page_rows(df_score[sort_by].to_numpy(), page, page_size)
+    st.caption(f"Filas {(page - 1) * page_size + 1}–{(page - 1) * page_size + len(rows)} de {len(df_score)}")
+    st.dataframe(highlight_scores(df_score.iloc[rows], df_score), use_container_width=True)
 
 
-# --- Streamlit App ---
+# Sliders de la tabla: columna -> (etiqueta, prefijo de la clave del widget)
+filter_sliders = {
+    'Minutos jugados': ("Minutos jugados", "minutos"),
+    'Altura': ("Altura (cm)", "altura"),
+    'Edad': ("Edad", "edad"),
+}
 
-st.title("Análisis de Jugadores y Roles")
 
-st.sidebar.header("Carga de datos")
+def filter_ranges(df):
+    return {
+        'Minutos jugados': (int(df['Minutos jugados'].min()), int(df['Minutos jugados'].max())),
+        'Altura': (max(0, int(df['Altura'].min())), int(df['Altura'].max())),
+        'Edad': (int(df['Edad'].min()), int(df['Edad'].max())),
+    }
 
-uploaded_file_mid = st.sidebar.file_uploader("Sube archivo mediocampistas", type=["xlsx"], key="mid")
-uploaded_file_cbs = st.sidebar.file_uploader("Sube archivo defensas centrales", type=["xlsx"], key="cbs")
-uploaded_file_wingers = st.sidebar.file_uploader("Sube archivo extremos", type=["xlsx"], key="wingers")
-uploaded_file_laterales = st.sidebar.file_uploader("Sube archivo laterales", type=["xlsx"], key="laterales")
-uploaded_file_delanteros = st.sidebar.file_uploader("Sube archivo de delanteros", type=["xlsx"], key="delanteros")
 
+def missing_data_message(group, from_store):
+    if from_store:
+        return f"No hay {ui_texts[group]['Archivo']} en la base de datos local para la temporada seleccionada."
+    return f"Por favor, sube el archivo de {ui_texts[group]['Archivo']} desde la barra lateral."
 
 
-tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10 = st.tabs([
-    "Mediocampistas", "Radar Mediocampistas", "Centrales", "Radar Centrales", "Extremos", "Radar Extremos", "Laterales", "Radar Laterales", "Delanteros", "Radar Delanteros"
-])
+def render_leaderboards(group, session, filter_params, method, shrinkage=None):
+    st.subheader("Top por rol")
+    n = st.slider("Jugadores por rol", min_value=5, max_value=50, value=20, key=f"top_n_{group}")
+    roles = list(session.roles_metrics)
+    for start in range(0, len(roles), 2):
+        for column, role in zip(st.columns(2), roles[start:start + 2]):
+            with column:
+                st.markdown(f"**{role.strip()}**")
+                st.dataframe(session.leaderboard(filter_params, role, n, method, shrinkage), use_container_width=True)
 
 
+def render_table_tab(group, session, method, from_store=False, descriptions=None, shrinkage=None):
+    texts = ui_texts[group]
+    if session is None:
+        st.info(missing_data_message(group, from_store))
+        return
+    roles_metrics = session.roles_metrics
+    descriptions = descriptions or {}
 
-with tab1:
-    if uploaded_file_mid is not None:
-        df_mid = pd.read_excel(uploaded_file_mid)
-        df_mid = df_mid.rename(columns={v: k for k, v in column_map.items()})
+    missing = session.missing_metrics()
+    if missing:
+        st.warning("El archivo no tiene estas métricas de los roles (cuentan como 0): " + ", ".join(missing))
 
-        minutos_min, minutos_max = int(df_mid['Minutos jugados'].min()), int(df_mid['Minutos jugados'].max())
-        altura_min, altura_max = max(0, int(df_mid['Altura'].min())), int(df_mid['Altura'].max())
-        edad_min, edad_max = int(df_mid['Edad'].min()), int(df_mid['Edad'].max())
+    ranges = filter_ranges(session.data)
 
-        st.header("Filtrar y visualizar tabla - Mediocampistas")
-        minutos = st.slider("Minutos jugados", min_value=minutos_min, max_value=minutos_max, value=(minutos_min, minutos_max))
-        altura = st.slider("Altura (cm)", min_value=altura_min, max_value=altura_max, value=(altura_min, altura_max))
-        edad = st.slider("Edad", min_value=edad_min, max_value=edad_max, value=(edad_min, edad_max))
+    st.header(f"Filtrar y visualizar tabla - {texts['Titulo']}")
+    filter_params = {}
+    for column, (label, prefix) in filter_sliders.items():
+        min_value, max_value = ranges[column]
+        filter_params[column] = st.slider(label, min_value=min_value, max_value=max_value,
+                                          value=(min_value, max_value), key=f"{prefix}_{group}")
 
-        # Mostrar descripciones de roles
+    # Mostrar descripciones de roles
+    described = [role for role in roles_metrics if role in descriptions]
+    if described:
         st.subheader("Roles y Descripciones")
-        for role, desc in role_descriptions.items():
+        for role in described:
+            desc = descriptions[role]
             st.markdown(f"**{desc['Nombre']} ({role.strip()})**")
             st.markdown(f"Posición típica: {desc['Posición']}")
             st.markdown(f"{desc['Descripción']}\n")
 
-        filter_params = {
-            'Minutos jugados': minutos,
-            'Altura': altura,
-            'Edad': edad
-        }
-        df_filtered = filter_players(df_mid, filter_params)
-        if df_filtered.empty:
-            st.warning("No se encontraron jugadores con esos filtros.")
-        else:
-            df_score = calculate_score_all_roles_wide(df_filtered, roles_metrics_mid)
-            st.dataframe(highlight_scores(df_score), use_container_width=True)
-
+    with stage("puntuación", group):
+        df_score = session.score(filter_params, method, shrinkage)
+    if df_score.empty:
+        st.warning(f"No se encontraron {texts['Jugadores']} con esos filtros.")
     else:
-        st.info("Por favor, sube el archivo de mediocampistas desde la barra lateral.")
-
-
-# --- Radar Mediocampistas (modificado) ---
-with tab2:
-    if uploaded_file_mid is not None:
-        df_radar = pd.read_excel(uploaded_file_mid)
-        df_radar = df_radar.rename(columns={v: k for k, v in column_map.items()})
-
-        for r in roles_metrics_mid.keys():
-            for metric in roles_metrics_mid[r]["Metrics"]:
-                if metric in df_radar.columns:
-                    norm_col = metric + " Normalized"
-                    df_radar[norm_col] = normalize_series(df_radar[metric])
-
-        selected_players = st.multiselect("Selecciona uno o varios jugadores", df_radar["Player"].unique())
-        selected_role = st.selectbox("Selecciona un rol para el radar", list(roles_metrics_mid.keys()))
-
-        if selected_players:
-            metrics = roles_metrics_mid[selected_role]["Metrics"]
-            labels = metrics + [metrics[0]]  # cerrar círculo
+        with stage("tabla", group):
+            render_score_table(group, df_score)
+        with stage("rankings", group):
+            render_leaderboards(group, session, filter_params, method, shrinkage)
+
+
+def render_radar_tab(group, session, method, from_store=False):
+    texts = ui_texts[group]
+    if session is None:
+        message = missing_data_message(group, from_store)
+        st.info(message if from_store else message[:-1] + " para usar el radar.")
+        return
+    roles_metrics = session.roles_metrics
+
+    # plotly solo se importa cuando se dibuja un radar
+    import plotly.graph_objects as go
+
+    with stage("radar", group):
+        radar = session.radar(method)
+
+    selected_players = st.multiselect(f"Selecciona uno o varios {texts['Jugadores']}", radar.players,
+                                      key=f"radar_players_{group}")
+    selected_role = st.selectbox(texts["Rol radar"], list(roles_metrics.keys()), key=f"radar_role_{group}")
+
+    if selected_players:
+        metrics = roles_metrics[selected_role]["Metrics"]
+        labels = metrics + [metrics[0]]  # cerrar círculo
+        with stage("gráfico", group):
             fig = go.Figure()
 
-            for player in selected_players:
-                player_radar_row = df_radar[df_radar["Player"] == player]
-                if not player_radar_row.empty:
-                    player_radar_row = player_radar_row.iloc[0]
-                    values = []
-                    for metric in metrics:
-                        norm_col = metric + " Normalized"
-                        values.append(player_radar_row[norm_col] if norm_col in player_radar_row else 0)
-                    values += [values[0]]  # cerrar círculo
-
-                    fig.add_trace(go.Scatterpolar(
-                        r=values,
-                        theta=labels,
-                        fill='toself',
-                        name=player
-                    ))
+            players, player_values = radar.player_values(selected_players, metrics)
+            for player, values in zip(players, player_values):
+                values = list(values) + [values[0]]  # cerrar círculo
+
+                fig.add_trace(go.Scatterpolar(
+                    r=values,
+                    theta=labels,
+                    fill='toself',
+                    name=player
+                ))
 
             fig.update_layout(
                 polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-                title=f"Radar de jugadores - Rol: {selected_role}",
+                title=f"Radar de {texts['Jugadores']} - Rol: {selected_role}",
                 legend_title_text="Jugadores"
             )
             st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("Selecciona al menos un jugador para visualizar el radar.")
-    else:
-        st.info("Por favor, sube el archivo de mediocampistas desde la barra lateral para usar el radar.")
-
-
-# --- Defensas Centrales ---
-with tab3:
-    if uploaded_file_cbs is not None:
-        df_cbs = pd.read_excel(uploaded_file_cbs)
-        df_cbs = df_cbs.rename(columns={v: k for k, v in column_map.items()})
-
-        minutos_min_cbs, minutos_max_cbs = int(df_cbs['Minutos jugados'].min()), int(df_cbs['Minutos jugados'].max())
-        altura_min_cbs, altura_max_cbs = max(0, int(df_cbs['Altura'].min())), int(df_cbs['Altura'].max())
-        edad_min_cbs, edad_max_cbs = int(df_cbs['Edad'].min()), int(df_cbs['Edad'].max())
-
-        st.header("Filtrar y visualizar tabla - Defensas Centrales")
-        minutos_cbs = st.slider("Minutos jugados", min_value=minutos_min_cbs, max_value=minutos_max_cbs, value=(minutos_min_cbs, minutos_max_cbs))
-        altura_cbs = st.slider("Altura (cm)", min_value=altura_min_cbs, max_value=altura_max_cbs, value=(altura_min_cbs, altura_max_cbs))
-        edad_cbs = st.slider("Edad", min_value=edad_min_cbs, max_value=edad_max_cbs, value=(edad_min_cbs, edad_max_cbs))
-
-        filter_params_cbs = {
-            'Minutos jugados': minutos_cbs,
-            'Altura': altura_cbs,
-            'Edad': edad_cbs
-        }
-        df_filtered_cbs = filter_players(df_cbs, filter_params_cbs)
-        if df_filtered_cbs.empty:
-            st.warning("No se encontraron defensas centrales con esos filtros.")
-        else:
-            df_score_cbs = calculate_score_all_roles_wide(df_filtered_cbs, roles_metrics_cbs)
-            st.dataframe(highlight_scores(df_score_cbs), use_container_width=True)
-
-    else:
-        st.info("Por favor, sube el archivo de defensas centrales desde la barra lateral.")
-
-
-# --- Radar Defensas Centrales (modificado) ---
-with tab4:
-    if uploaded_file_cbs is not None:
-        df_radar_cbs = pd.read_excel(uploaded_file_cbs)
-        df_radar_cbs = df_radar_cbs.rename(columns={v: k for k, v in column_map.items()})
-
-        for r in roles_metrics_cbs.keys():
-            for metric in roles_metrics_cbs[r]["Metrics"]:
-                if metric in df_radar_cbs.columns:
-                    norm_col = metric + " Normalized"
-                    df_radar_cbs[norm_col] = normalize_series(df_radar_cbs[metric])
-
-        selected_players_cbs = st.multiselect("Selecciona uno o varios defensas centrales", df_radar_cbs["Player"].unique())
-        selected_role_cbs = st.selectbox("Selecciona un rol para el radar (Defensas Centrales)", list(roles_metrics_cbs.keys()))
-
-        if selected_players_cbs:
-            metrics_cbs = roles_metrics_cbs[selected_role_cbs]["Metrics"]
-            labels_cbs = metrics_cbs + [metrics_cbs[0]]  # cerrar círculo
-            fig_cbs = go.Figure()
-
-            for player_cbs in selected_players_cbs:
-                player_radar_row_cbs = df_radar_cbs[df_radar_cbs["Player"] == player_cbs]
-                if not player_radar_row_cbs.empty:
-                    player_radar_row_cbs = player_radar_row_cbs.iloc[0]
-                    values_cbs = []
-                    for metric in metrics_cbs:
-                        norm_col = metric + " Normalized"
-                        values_cbs.append(player_radar_row_cbs[norm_col] if norm_col in player_radar_row_cbs else 0)
-                    values_cbs += [values_cbs[0]]  # cerrar círculo
-
-                    fig_cbs.add_trace(go.Scatterpolar(
-                        r=values_cbs,
-                        theta=labels_cbs,
-                        fill='toself',
-                        name=player_cbs
-                    ))
-
-            fig_cbs.update_layout(
-                polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-                title=f"Radar de defensas centrales - Rol: {selected_role_cbs}",
-                legend_title_text="Jugadores"
-            )
-            st.plotly_chart(fig_cbs, use_container_width=True)
-        else:
-            st.info("Selecciona al menos un defensa central para visualizar el radar.")
-    else:
-        st.info("Por favor, sube el archivo de defensas centrales desde la barra lateral para usar el radar.")
-
-# --- Extremos ---
-with tab5:
-    if uploaded_file_wingers is not None:
-        df_wingers = pd.read_excel(uploaded_file_wingers)
-        df_wingers = df_wingers.rename(columns={v: k for k, v in column_map.items()})
-
-        minutos_min_w, minutos_max_w = int(df_wingers['Minutos jugados'].min()), int(df_wingers['Minutos jugados'].max())
-        altura_min_w, altura_max_w = max(0, int(df_wingers['Altura'].min())), int(df_wingers['Altura'].max())
-        edad_min_w, edad_max_w = int(df_wingers['Edad'].min()), int(df_wingers['Edad'].max())
-
-        st.header("Filtrar y visualizar tabla - Extremos")
-        minutos_w = st.slider("Minutos jugados", min_value=minutos_min_w, max_value=minutos_max_w, value=(minutos_min_w, minutos_max_w))
-        altura_w = st.slider("Altura (cm)", min_value=altura_min_w, max_value=altura_max_w, value=(altura_min_w, altura_max_w))
-        edad_w = st.slider("Edad", min_value=edad_min_w, max_value=edad_max_w, value=(edad_min_w, edad_max_w))
-
-        filter_params_w = {
-            'Minutos jugados': minutos_w,
-            'Altura': altura_w,
-            'Edad': edad_w
-        }
-
-        df_filtered_wingers = filter_players(df_wingers, filter_params_w)
-
-        if df_filtered_wingers.empty:
-            st.warning("No se encontraron extremos con esos filtros.")
-        else:
-            df_score_wingers = calculate_score_all_roles_wide(df_filtered_wingers, roles_metrics_wingers)
-            st.dataframe(highlight_scores(df_score_wingers), use_container_width=True)
-
     else:
-        st.info("Por favor, sube el archivo de extremos desde la barra lateral.")
-
-
-# --- Radar Extremos ---
-with tab6:
-    if uploaded_file_wingers is not None:
-        df_radar_wingers = pd.read_excel(uploaded_file_wingers)
-        df_radar_wingers = df_radar_wingers.rename(columns={v: k for k, v in column_map.items()})
-
-        for r in roles_metrics_wingers.keys():
-            for metric in roles_metrics_wingers[r]["Metrics"]:
-                if metric in df_radar_wingers.columns:
-                    norm_col = metric + " Normalized"
-                    df_radar_wingers[norm_col] = normalize_series(df_radar_wingers[metric])
-
-        selected_players_wingers = st.multiselect("Selecciona uno o varios extremos", df_radar_wingers["Player"].unique())
-        selected_role_wingers = st.selectbox("Selecciona un rol para el radar (Extremos)", list(roles_metrics_wingers.keys()))
-
-        if selected_players_wingers:
-            metrics_w = roles_metrics_wingers[selected_role_wingers]["Metrics"]
-            labels_w = metrics_w + [metrics_w[0]]  # cerrar círculo
-            fig_w = go.Figure()
-
-            for player_w in selected_players_wingers:
-                player_radar_row_w = df_radar_wingers[df_radar_wingers["Player"] == player_w]
-                if not player_radar_row_w.empty:
-                    player_radar_row_w = player_radar_row_w.iloc[0]
-                    values_w = []
-                    for metric in metrics_w:
-                        norm_col = metric + " Normalized"
-                        values_w.append(player_radar_row_w[norm_col] if norm_col in player_radar_row_w else 0)
-                    values_w += [values_w[0]]  # cerrar círculo
-
-                    fig_w.add_trace(go.Scatterpolar(
-                        r=values_w,
-                        theta=labels_w,
-                        fill='toself',
-                        name=player_w
-                    ))
-
-            fig_w.update_layout(
-                polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-                title=f"Radar de extremos - Rol: {selected_role_wingers}",
-                legend_title_text="Jugadores"
-            )
-            st.plotly_chart(fig_w, use_container_width=True)
-        else:
-            st.info("Selecciona al menos un extremo para visualizar el radar.")
-    else:
-        st.info("Por favor, sube el archivo de extremos desde la barra lateral para usar el radar.")
-
-
-# --- Laterales ---
-with tab7:
-    if uploaded_file_laterales is not None:
-        df_laterales = pd.read_excel(uploaded_file_laterales)
-        df_laterales = df_laterales.rename(columns={v: k for k, v in column_map.items()})
-
-        minutos_min_l, minutos_max_l = int(df_laterales['Minutos jugados'].min()), int(df_laterales['Minutos jugados'].max())
-        altura_min_l, altura_max_l = max(0, int(df_laterales['Altura'].min())), int(df_laterales['Altura'].max())
-        edad_min_l, edad_max_l = int(df_laterales['Edad'].min()), int(df_laterales['Edad'].max())
-
-        st.header("Filtrar y visualizar tabla - Laterales")
-        minutos_l = st.slider("Minutos jugados", min_value=minutos_min_l, max_value=minutos_max_l, value=(minutos_min_l, minutos_max_l))
-        altura_l = st.slider("Altura (cm)", min_value=altura_min_l, max_value=altura_max_l, value=(altura_min_l, altura_max_l))
-        edad_l = st.slider("Edad", min_value=edad_min_l, max_value=edad_max_l, value=(edad_min_l, edad_max_l))
-
-        filter_params_l = {
-            'Minutos jugados': minutos_l,
-            'Altura': altura_l,
-            'Edad': edad_l
-        }
-
-        df_filtered_laterales = filter_players(df_laterales, filter_params_l)
-
-        if df_filtered_laterales.empty:
-            st.warning("No se encontraron laterales con esos filtros.")
-        else:
-            df_score_laterales = calculate_score_all_roles_wide(df_filtered_laterales, roles_metrics_laterales)
-            st.dataframe(highlight_scores(df_score_laterales), use_container_width=True)
-
+        st.info(f"Selecciona al menos {texts['Uno']} para visualizar el radar.")
+
+    render_radar_export(group, session, radar, method, selected_players, selected_role)
+
+
+def render_radar_export(group, session, radar, method, selected_players, selected_role):
+    with st.expander("Exportar radares (zip)"):
+        players = st.multiselect("Jugadores", radar.players, default=selected_players, key=f"export_players_{group}")
+        roles = st.multiselect("Roles", list(session.roles_metrics), default=[selected_role],
+                               key=f"export_roles_{group}")
+        fmt = st.selectbox("Formato", REPORT_FORMATS, key=f"export_format_{group}")
+        if st.button("Generar radares", key=f"export_run_{group}", disabled=not (players and roles)):
+            buffer = io.BytesIO()
+            with st.spinner("Dibujando radares..."), stage("exportar radares", group):
+                n_files = export_radars(radar_jobs(session, players, roles, method, fmt), buffer)
+            st.download_button(f"Descargar {n_files} radares", buffer.getvalue(), file_name=f"radares_{group}.zip",
+                               mime="application/zip", key=f"export_download_{group}")
+
+
+def render_similar_tab(sessions, method):
+    groups = [group for group in position_groups if sessions[group] is not None]
+    if not groups:
+        st.info("Por favor, sube al menos un archivo desde la barra lateral para buscar jugadores similares.")
+        return
+
+    st.header("Buscar jugadores similares")
+    group = st.selectbox("Grupo de posición", groups, format_func=lambda g: position_groups[g]["Nombre"],
+                         key="similar_group")
+    session = sessions[group]
+    roles_metrics = session.roles_metrics
+
+    role = st.selectbox("Rol de referencia", list(roles_metrics.keys()), key=f"similar_role_{group}")
+    player = st.selectbox("Jugador", session.radar(method).players, key=f"similar_player_{group}")
+    k = st.slider("Número de jugadores similares", min_value=1, max_value=50, value=10, key="similar_k")
+
+    if player is not None:
+        df_similar = similar_players(session, role, player, k, method)
+        st.dataframe(df_similar, use_container_width=True)
+
+
+def render_best_role_tab(sessions, uploaded_files, store, season, dataset_cache, plan, method):
+    groups = [group for group in position_groups if sessions[group] is not None]
+    if not groups:
+        st.info("Por favor, sube al menos un archivo desde la barra lateral para comparar roles entre posiciones.")
+        return
+
+    # Cada export se vuelve a leer con las métricas de todos los roles, no solo las de su grupo
+    columns = pool_columns(plan)
+    if season is not None:
+        sources = {group: ("base", store.path, season, store.revision(group, season)) for group in groups}
+        load = partial(store.query, season=season, columns=columns)
     else:
-        st.info("Por favor, sube el archivo de laterales desde la barra lateral.")
-
-
-# --- Radar Laterales ---
-with tab8:
-    if uploaded_file_laterales is not None:
-        df_radar_laterales = pd.read_excel(uploaded_file_laterales)
-        df_radar_laterales = df_radar_laterales.rename(columns={v: k for k, v in column_map.items()})
-
-        for r in roles_metrics_laterales.keys():
-            for metric in roles_metrics_laterales[r]["Metrics"]:
-                if metric in df_radar_laterales.columns:
-                    norm_col = metric + " Normalized"
-                    df_radar_laterales[norm_col] = normalize_series(df_radar_laterales[metric])
-
-        selected_players_laterales = st.multiselect("Selecciona uno o varios laterales", df_radar_laterales["Player"].unique())
-        selected_role_laterales = st.selectbox("Selecciona un rol para el radar (Laterales)", list(roles_metrics_laterales.keys()))
-
-        if selected_players_laterales:
-            metrics_l = roles_metrics_laterales[selected_role_laterales]["Metrics"]
-            labels_l = metrics_l + [metrics_l[0]]  # cerrar círculo
-            fig_l = go.Figure()
-
-            for player_l in selected_players_laterales:
-                player_radar_row_l = df_radar_laterales[df_radar_laterales["Player"] == player_l]
-                if not player_radar_row_l.empty:
-                    player_radar_row_l = player_radar_row_l.iloc[0]
-                    values_l = []
-                    for metric in metrics_l:
-                        norm_col = metric + " Normalized"
-                        values_l.append(player_radar_row_l[norm_col] if norm_col in player_radar_row_l else 0)
-                    values_l += [values_l[0]]  # cerrar círculo
-
-                    fig_l.add_trace(go.Scatterpolar(
-                        r=values_l,
-                        theta=labels_l,
-                        fill='toself',
-                        name=player_l
-                    ))
-
-            fig_l.update_layout(
-                polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-                title=f"Radar de laterales - Rol: {selected_role_laterales}",
-                legend_title_text="Jugadores"
-            )
-            st.plotly_chart(fig_l, use_container_width=True)
+        sources = {group: file_hash(uploaded_files[group]) for group in groups}
+        load = lambda group: read_imported(uploaded_files[group], columns)
+    with stage("mejor rol"):
+        matrix = best_role_matrix(sources, load, plan, dataset_cache, method)
+    st.header("Mejor rol para cada jugador")
+    st.caption(f"{len(matrix)} jugadores de todos los archivos, puntuados en {len(matrix.roles)} roles.")
+    st.dataframe(matrix.top_roles(3), use_container_width=True)
+
+    st.subheader("Ranking por rol")
+    r = st.selectbox("Rol", range(len(matrix.roles)), format_func=matrix.labels.__getitem__, key="best_role_role")
+    k = st.slider("Número de jugadores", min_value=1, max_value=100, value=20, key="best_role_k")
+    group, role = matrix.roles[r]
+    st.dataframe(matrix.leaderboard(group, role, k), use_container_width=True)
+
+
+def render_trends_tab(store, dataset_cache, plan, method, shrinkage=None):
+    groups = [group for group in position_groups if store.seasons(group)]
+    if not groups:
+        st.info("Guarda exports de varias temporadas en la base de datos local para ver la evolución de los puntajes.")
+        return
+
+    st.header("Evolución por temporada")
+    group = st.selectbox("Posición", groups, format_func=lambda g: position_groups[g]["Nombre"], key="trend_group")
+    roles = [role.strip() for role in plan.roles(group)]
+    role = st.selectbox("Rol", roles, key="trend_role")
+    min_minutes = st.number_input("Minutos jugados mínimos", min_value=0, value=0, step=90, key="trend_minutos")
+    window = st.slider("Temporadas de la media móvil y la tendencia", min_value=2, max_value=6, value=3,
+                       key="trend_ventana")
+
+    # El histórico se comparte entre sesiones a través de la caché (con su límite de memoria);
+    # solo se puntúan las temporadas nuevas o reimportadas
+    key = ("evolución", store.path, group, plan.hash, method, shrinkage, min_minutes)
+    history = dataset_cache.get(key)
+    if history is None:
+        history = TrendHistory(plan.roles(group), method, {'Minutos jugados': (min_minutes, np.inf)}, shrinkage)
+        dataset_cache.put(key, history)
+    with stage("evolución", group):
+        history.sync_store(store, group, dataset_cache, plan.roles(group), plan.role_weights(group))
+        table = history.trends(role, window, min_snapshots=2)
+    st.caption(f"{len(history)} temporadas, {len(table)} jugadores en al menos dos. "
+               "Cada temporada se normaliza por separado; Tendencia son puntos por temporada.")
+    rows = top_rows(table["Tendencia"].to_numpy(), len(table))
+    st.dataframe(table.iloc[rows], use_container_width=True)
+
+    players = st.multiselect("Jugadores", table['Player'].iloc[rows].tolist(), key="trend_players")
+    if players:
+        import plotly.express as px
+
+        history_long = history.player_history(players, role, window)
+        st.plotly_chart(px.line(history_long, x="Temporada", y="Puntaje", color="Player", markers=True),
+                        use_container_width=True)
+
+
+def render_store_sidebar(uploaded_files, dataset_cache, plan):
+    # Base de datos local: guarda los exports por temporada y permite trabajar sin volver a subirlos
+    if "player_store" not in st.session_state:
+        st.session_state["player_store"] = PlayerStore()
+    store = st.session_state["player_store"]
+
+    with st.sidebar.expander("Base de datos local"):
+        import_season = st.text_input("Temporada de los archivos subidos", key="store_import_season")
+        if st.button("Guardar archivos subidos en la base", key="store_import"):
+            if not import_season:
+                st.warning("Indica la temporada antes de guardar.")
+            for group, uploaded_file in uploaded_files.items():
+                if uploaded_file is None or not import_season:
+                    continue
+                df = load_dataset(uploaded_file, dataset_cache, dataset_columns(plan.roles(group)))
+                counts = store.ingest(df, group, import_season, plan.roles(group))
+                st.success(f"{position_groups[group]['Nombre']}: {counts['nuevos']} nuevos, "
+                           f"{counts['actualizados']} actualizados, {counts['sin cambios']} sin cambios, "
+                           f"{counts['eliminados']} eliminados")
+
+        seasons = sorted({season for group in position_groups for season in store.seasons(group)})
+        from_store = st.checkbox("Usar la base de datos local en lugar de los archivos", key="store_use",
+                                 disabled=not seasons)
+        season = st.selectbox("Temporada", seasons, key="store_season") if from_store else None
+    return from_store and season is not None, season
+
+
+def prepare_group(group, load, method, shrinkage, slider_state, recorder):
+    # Trabajo del planificador: carga la sesión y deja en su caché la tabla con los
+    # filtros actuales y el radar, así la pestaña solo tiene que pintarlos
+    def job(check):
+        with recorder.stage("carga", group):
+            session = load()
+        if session is None:
+            return None
+        check()
+        ranges = filter_ranges(session.data)
+        filter_params = {column: tuple(slider_state.get(column) or ranges[column]) for column in ranges}
+        with recorder.stage("puntuación", group):
+            session.score(filter_params, method, shrinkage)
+        check()
+        with recorder.stage("radar", group):
+            session.radar(method)
+        return session
+    return job
+
+
+# Etapas de la ingesta en segundo plano de cada archivo subido
+ingest_stages = ["lectura", "columnas", "normalización", "puntuación"]
+
+
+def ingest_upload(uploaded_file, dataset_cache, roles_metrics, role_weights, method, shrinkage):
+    def job(task):
+        # Copia propia del archivo: el hilo de la ingesta no comparte la posición de lectura con el rerun
+        data = io.BytesIO(uploaded_file.getvalue())
+        data.name = uploaded_file.name
+        session = load_scoring_session(data, dataset_cache, roles_metrics, task.advance, role_weights)
+        task.advance("normalización")
+        session.radar(method)
+        # Misma clave que los sliders en su posición inicial: la pestaña abre con la tabla ya puntuada
+        task.advance("puntuación")
+        session.score(filter_ranges(session.data), method, shrinkage)
+        return session
+    return job
+
+
+def ingest_label(group, task):
+    return f"Procesando {ui_texts[group]['Archivo']}: {task.stage or 'en cola'}..."
+
+
+def render_ingest_progress(group, task):
+    if task.error is not None:
+        st.error(f"No se pudo procesar el archivo de {ui_texts[group]['Archivo']}: {task.error}")
+        return None
+    return st.progress(task.progress, text=ingest_label(group, task))
+
+
+def render_ingest_status(pipeline):
+    # Estado de cada archivo subido en la barra lateral
+    for group in position_groups:
+        task = pipeline.status(group)
+        if task is None:
+            continue
+        name = position_groups[group]["Nombre"]
+        if task.error is not None:
+            st.sidebar.caption(f"❌ {name}: error")
+        elif task.ready:
+            st.sidebar.caption(f"✅ {name}: listo ({task.finished - task.started:.1f} s)")
         else:
-            st.info("Selecciona al menos un lateral para visualizar el radar.")
-    else:
-        st.info("Por favor, sube el archivo de laterales desde la barra lateral para usar el radar.")
+            st.sidebar.caption(f"⏳ {name}: {task.stage or 'en cola'} ({task.completed}/{len(task.stages)})")
+
+
+def wait_for_ingest(ingesting, bars):
+    # Mientras quedan archivos en proceso el script actualiza las barras y vuelve a
+    # ejecutarse en cuanto uno termina (también si terminó mientras se pintaban las
+    # pestañas); cualquier interacción del usuario lo interrumpe
+    futures = [task.future for task in ingesting.values() if task.error is None]
+    while futures:
+        done, futures = wait(futures, timeout=0.25, return_when=FIRST_COMPLETED)
+        if done:
+            st.session_state["ingest_rerun"] = True
+            st.rerun()
+        for group, group_bars in bars.items():
+            task = ingesting[group]
+            for bar in group_bars:
+                bar.progress(task.progress, text=ingest_label(group, task))
+
+
+def render_debug_panel(recorder, dataset_cache):
+    records = recorder.last_run()
+    with st.sidebar.expander("Tiempos del último rerun", expanded=True):
+        cache_stats = dataset_cache.stats()
+        st.caption(f"Caché compartida: {cache_stats['entradas']} entradas, {cache_stats['bytes'] / 2 ** 20:.1f} MB, "
+                   f"{cache_stats['aciertos']} aciertos, {cache_stats['fallos']} fallos, "
+                   f"{cache_stats['aciertos en disco']} aciertos en disco")
+        st.caption("Pico MB: memoria asignada por todo el proceso durante la etapa (aproximado); vacío si "
+                   "otra etapa medida, de esta u otra sesión, corría a la vez.")
+        st.dataframe([{"Etapa": r["etapa"], "Grupo": r["grupo"], "ms": round(r["segundos"] * 1000, 1),
+                       "Pico MB (aprox.)": None if r["pico_bytes"] is None else round(r["pico_bytes"] / 2 ** 20, 2),
+                       "Hilo": r["hilo"]} for r in records], use_container_width=True)
+        st.download_button("Descargar traza (chrome://tracing)", recorder.trace(), file_name="traza.json",
+                           mime="application/json", key="debug_trace")
+        st.download_button("Descargar log (JSON Lines)", recorder.log(), file_name="tiempos.jsonl",
+                           mime="application/x-ndjson", key="debug_log")
+
+
+@st.cache_resource
+def shared_cache():
+    # Una sola caché por proceso: varios analistas con los mismos exports comparten lectura y puntajes
+    return DatasetCache(max_entries=100, max_bytes=CACHE_MAX_BYTES, directory=CACHE_DIR)
+
+
+@st.cache_resource
+def role_plan_loader():
+    # Roles desde SCOUTING_ROLES_PATH (JSON/YAML), recargados al cambiar el archivo
+    return PlanLoader()
 
-# --- Delanteros Tabla ---
-with tab9:
-    if uploaded_file_delanteros is not None:
-        df_delanteros = pd.read_excel(uploaded_file_delanteros)
-        df_delanteros = df_delanteros.rename(columns={v: k for k, v in column_map.items()})
 
-        minutos_min_d, minutos_max_d = int(df_delanteros['Minutos jugados'].min()), int(df_delanteros['Minutos jugados'].max())
-        altura_min_d, altura_max_d = max(0, int(df_delanteros['Altura'].min())), int(df_delanteros['Altura'].max())
-        edad_min_d, edad_max_d = int(df_delanteros['Edad'].min()), int(df_delanteros['Edad'].max())
-
-        st.header("Filtrar y visualizar tabla - Delanteros")
-        minutos_d = st.slider("Minutos jugados", min_value=minutos_min_d, max_value=minutos_max_d, value=(minutos_min_d, minutos_max_d))
-        altura_d = st.slider("Altura (cm)", min_value=altura_min_d, max_value=altura_max_d, value=(altura_min_d, altura_max_d))
-        edad_d = st.slider("Edad", min_value=edad_min_d, max_value=edad_max_d, value=(edad_min_d, edad_max_d))
-
-        filter_params_d = {
-            'Minutos jugados': minutos_d,
-            'Altura': altura_d,
-            'Edad': edad_d
-        }
-
-        df_filtered_delanteros = filter_players(df_delanteros, filter_params_d)
+# --- Streamlit App ---
+def main():
+    st.title("Análisis de Jugadores y Roles")
+
+    st.sidebar.header("Carga de datos")
+
+    dataset_cache = shared_cache()
+    loader = role_plan_loader()
+    plan = loader.get()
+    if loader.error:
+        st.sidebar.error(f"Configuración de roles no válida; se mantiene la anterior. {loader.error}")
+
+    if "recorder" not in st.session_state:
+        st.session_state["recorder"] = StageRecorder()
+    recorder = st.session_state["recorder"]
+    recorder.enable(st.sidebar.checkbox("Medir tiempos y memoria (depuración)", key="debug_timings"))
+    recorder.start_run()
+
+    method = st.sidebar.selectbox("Normalización de métricas", list(normalization_methods),
+                                  format_func=normalization_methods.get, key="normalizacion")
+    # Acerca las métricas de jugadores con pocos minutos a la media en vez de descartarlos con el slider
+    shrinkage = st.sidebar.selectbox("Contracción por minutos jugados", list(shrinkage_modes),
+                                     format_func=shrinkage_modes.get, key="contraccion")
+
+    uploaded_files = {
+        group: st.sidebar.file_uploader(ui_texts[group]["Uploader"], type=["xlsx", "csv"], key=group)
+        for group in position_groups
+    }
 
-        if df_filtered_delanteros.empty:
-            st.warning("No se encontraron delanteros con esos filtros.")
+    from_store, season = render_store_sidebar(uploaded_files, dataset_cache, plan)
+
+    if "scheduler" not in st.session_state:
+        st.session_state["scheduler"] = ScoringScheduler(max_workers=len(position_groups))
+    scheduler = st.session_state["scheduler"]
+
+    if "ingest" not in st.session_state:
+        st.session_state["ingest"] = IngestPipeline(ingest_stages, max_workers=len(position_groups))
+    pipeline = st.session_state["ingest"]
+
+    # Los cinco grupos se cargan y puntúan en paralelo; un rerun nuevo cancela los trabajos del anterior.
+    # Los archivos subidos se procesan en segundo plano: sus pestañas muestran el progreso hasta que están listos
+    jobs = {}
+    ingesting = {}
+    # Los archivos que fallaron se reintentan en el siguiente rerun del usuario, no en el
+    # que lanza la propia ingesta al terminar (así un error permanente no se repite sin fin)
+    retry_failed = not st.session_state.pop("ingest_rerun", False)
+    for group in position_groups:
+        if uploaded_files[group] is None:
+            pipeline.discard(group)
         else:
-            df_score_delanteros = calculate_score_all_roles_wide(df_filtered_delanteros, roles_metrics_delanteros)
-            st.dataframe(highlight_scores(df_score_delanteros), use_container_width=True)
-
-    else:
-        st.info("Por favor, sube el archivo de delanteros desde la barra lateral.")
-
-# --- Radar Delanteros ---
-with tab10:
-    if uploaded_file_delanteros is not None:
-        df_radar_delanteros = pd.read_excel(uploaded_file_delanteros)
-        df_radar_delanteros = df_radar_delanteros.rename(columns={v: k for k, v in column_map.items()})
-
-        for r in roles_metrics_delanteros.keys():
-            for metric in roles_metrics_delanteros[r]["Metrics"]:
-                if metric in df_radar_delanteros.columns:
-                    norm_col = metric + " Normalized"
-                    df_radar_delanteros[norm_col] = normalize_series(df_radar_delanteros[metric])
-
-        selected_players_delanteros = st.multiselect("Selecciona uno o varios delanteros", df_radar_delanteros["Player"].unique())
-        selected_role_delanteros = st.selectbox("Selecciona un rol para el radar (Delanteros)", list(roles_metrics_delanteros.keys()))
-
-        if selected_players_delanteros:
-            metrics_d = roles_metrics_delanteros[selected_role_delanteros]["Metrics"]
-            labels_d = metrics_d + [metrics_d[0]]  # cerrar círculo
-            fig_d = go.Figure()
-
-            for player_d in selected_players_delanteros:
-                player_radar_row_d = df_radar_delanteros[df_radar_delanteros["Player"] == player_d]
-                if not player_radar_row_d.empty:
-                    player_radar_row_d = player_radar_row_d.iloc[0]
-                    values_d = []
-                    for metric in metrics_d:
-                        norm_col = metric + " Normalized"
-                        values_d.append(player_radar_row_d[norm_col] if norm_col in player_radar_row_d else 0)
-                    values_d += [values_d[0]]  # cerrar círculo
-
-                    fig_d.add_trace(go.Scatterpolar(
-                        r=values_d,
-                        theta=labels_d,
-                        fill='toself',
-                        name=player_d
-                    ))
-
-            fig_d.update_layout(
-                polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-                title=f"Radar de delanteros - Rol: {selected_role_delanteros}",
-                legend_title_text="Jugadores"
-            )
-            st.plotly_chart(fig_d, use_container_width=True)
+            key = (file_hash(uploaded_files[group]), roles_hash(plan.roles(group)))
+            task = pipeline.submit(group, key, ingest_upload(uploaded_files[group], dataset_cache, plan.roles(group),
+                                                             plan.role_weights(group), method, shrinkage),
+                                   retry_failed)
+        if from_store:
+            load = partial(load_store_session, st.session_state["player_store"], group, season, dataset_cache,
+                           plan.roles(group), plan.role_weights(group))
+        elif uploaded_files[group] is not None:
+            if not task.ready:
+                ingesting[group] = task
+                continue
+            load = task.result
         else:
-            st.info("Selecciona al menos un delantero para visualizar el radar.")
-    else:
-        st.info("Por favor, sube el archivo de delanteros desde la barra lateral para usar el radar.")
-
+            continue
+        slider_state = {column: st.session_state.get(f"{prefix}_{group}")
+                        for column, (_, prefix) in filter_sliders.items()}
+        jobs[group] = prepare_group(group, load, method, shrinkage, slider_state, recorder)
+    sessions = dict.fromkeys(position_groups)
+    sessions.update(scheduler.gather(scheduler.submit(jobs)))
+
+    tab_names = []
+    for group in position_groups:
+        tab_names += [position_groups[group]["Nombre"], "Radar " + position_groups[group]["Nombre"]]
+    tab_names += ["Jugadores Similares", "Mejor Rol", "Evolución"]
+    tabs = st.tabs(tab_names)
+
+    bars = {}
+    for i, group in enumerate(position_groups):
+        if group in ingesting:
+            for tab in tabs[2 * i:2 * i + 2]:
+                with tab:
+                    bar = render_ingest_progress(group, ingesting[group])
+                    if bar is not None:
+                        bars.setdefault(group, []).append(bar)
+            continue
+        with tabs[2 * i]:
+            render_table_tab(group, sessions[group], method, from_store, plan.descriptions(group), shrinkage)
+        with tabs[2 * i + 1]:
+            render_radar_tab(group, sessions[group], method, from_store)
+    with tabs[-3]:
+        render_similar_tab(sessions, method)
+    with tabs[-2]:
+        render_best_role_tab(sessions, uploaded_files, st.session_state["player_store"], season, dataset_cache,
+                             plan, method)
+    with tabs[-1]:
+        render_trends_tab(st.session_state["player_store"], dataset_cache, plan, method, shrinkage)
+
+    render_ingest_status(pipeline)
+    if recorder.enabled:
+        recorder.finish_run()
+        render_debug_panel(recorder, dataset_cache)
+
+    wait_for_ingest(ingesting, bars)
+
+
+if __name__ == "__main__":
+    main()
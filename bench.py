@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from datasets import read_dataset
+from roles import column_map, position_groups
+from scoring import (ScoringSession, calculate_score_all_roles_wide, dataset_columns, filter_players,
+                     normalization_methods, normalize_series)
+
+# Escribir y leer xlsx con openpyxl lleva minutos a partir de ~100.000 filas (y una
+# hoja admite como mucho 1.048.575): por encima de este tamaño se usa csv
+XLSX_MAX_ROWS = 100000
+
+
+# --- Exports sintéticos ---
+# Mismo esquema que un export real: identidad, columnas de column_map (con su
+# nombre en inglés) y todas las métricas de todos los roles, con rangos
+# plausibles y algún valor vacío.
+def all_metrics():
+    metrics = []
+    for group in position_groups.values():
+        for role in group["Roles"].values():
+            for metric in role["Metrics"]:
+                if metric not in metrics:
+                    metrics.append(metric)
+    return metrics
+
+
+def make_export(n_rows, seed=0, missing=0.01):
+    rng = np.random.default_rng(seed)
+    data = {
+        'Player': [f"Jugador {i}" for i in range(n_rows)],
+        'Team': rng.choice([f"Equipo {i}" for i in range(40)], n_rows),
+        'Position': rng.choice(["CB", "LB", "RB", "DMF", "CMF", "AMF", "LW", "RW", "CF"], n_rows),
+        column_map['Minutos jugados']: rng.integers(0, 3500, n_rows),
+        column_map['Altura']: rng.integers(160, 200, n_rows),
+        column_map['Edad']: rng.integers(16, 40, n_rows),
+    }
+    for metric in all_metrics():
+        if "%" in metric:
+            values = rng.uniform(0, 100, n_rows)
+        else:
+            values = rng.gamma(2.0, 1.5, n_rows)
+        values[rng.random(n_rows) < missing] = np.nan
+        data[metric] = values.round(2)
+    return pd.DataFrame(data)
+
+
+def write_export(df, directory, fmt):
+    path = os.path.join(directory, f"bench_{len(df)}.{fmt}")
+    if fmt == "xlsx":
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+# --- Medición ---
+def timed(func, repeat):
+    runs = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - start)
+    return result, runs
+
+
+def bench_size(n_rows, group, fmt, repeat, seed, method):
+    roles_metrics = position_groups[group]["Roles"]
+    columns = dataset_columns(roles_metrics)
+    if fmt == "xlsx" and n_rows > XLSX_MAX_ROWS:
+        fmt = "csv"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_export(make_export(n_rows, seed), directory, fmt)
+        stages = {}
+        df, stages["read"] = timed(lambda: read_dataset(path, columns), repeat)
+
+    filter_params = {
+        'Minutos jugados': (int(df['Minutos jugados'].quantile(0.25)), int(df['Minutos jugados'].max())),
+        'Edad': (18, 35),
+    }
+    df_filtered, stages["filter"] = timed(lambda: filter_players(df, filter_params), repeat)
+    metrics = [metric for metric in columns[3 + len(column_map):] if metric in df_filtered.columns]
+    _, stages["normalize"] = timed(lambda: [normalize_series(df_filtered[m], method) for m in metrics], repeat)
+    _, stages["score"] = timed(lambda: calculate_score_all_roles_wide(df_filtered, roles_metrics, method), repeat)
+    # La sesión guarda resultados en caché: cada repetición usa una sesión nueva
+    _, stages["session"] = timed(lambda: ScoringSession(df, roles_metrics), repeat)
+    sessions = iter([ScoringSession(df, roles_metrics) for _ in range(repeat)])
+    _, stages["session_score"] = timed(lambda: next(sessions).score(filter_params, method), repeat)
+    sessions = iter([ScoringSession(df, roles_metrics) for _ in range(repeat)])
+    _, stages["radar"] = timed(lambda: next(sessions).radar(method), repeat)
+
+    return [{"rows": n_rows, "group": group, "format": fmt, "method": method, "stage": stage,
+             "seconds": min(runs), "runs": runs} for stage, runs in stages.items()]
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results, baseline_path):
+    # Cociente tiempo actual / tiempo de referencia por tamaño, grupo, formato,
+    # normalización y etapa (> 1 es más lento); solo se comparan mediciones equivalentes
+    def key(row):
+        return row["rows"], row["group"], row["format"], row["method"], row["stage"]
+
+    with open(baseline_path) as f:
+        baseline = {key(row): row["seconds"] for row in json.load(f)["results"]}
+    for row in results:
+        before = baseline.get(key(row))
+        if before:
+            print(f"{row['rows']:>9} {row['format']:<4} {row['method']:<10} {row['stage']:<14} "
+                  f"x{row['seconds'] / before:.2f}", file=sys.stderr)
+
+
+# python bench.py --sizes 1000 10000 100000 --out bench.json [--compare bench_anterior.json]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de puntuación con exports sintéticos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Filas por export")
+    parser.add_argument("--group", choices=list(position_groups), default="mid")
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx",
+                        help=f"Formato del export (por encima de {XLSX_MAX_ROWS} filas se escribe en csv)")
+    parser.add_argument("--normalizacion", choices=list(normalization_methods), default="minmax")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por etapa; se reporta la mejor")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Archivo JSON de resultados (por defecto, salida estándar)")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior con el que comparar")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_rows in args.sizes:
+        for row in bench_size(n_rows, args.group, args.format, args.repeat, args.seed, args.normalizacion):
+            print(f"{row['rows']:>9} {row['stage']:<14} {row['seconds']:.4f}s", file=sys.stderr)
+            results.append(row)
+
+    if args.compare:
+        compare(results, args.compare)
+
+    report = json.dumps({"environment": environment(), "results": results}, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
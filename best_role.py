@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from roles import position_groups
+from scoring import normalize_matrix, normalize_values, weighted_sum
+
+
+def role_label(group, role):
+    return f"{role.strip()} ({position_groups[group]['Nombre']})"
+
+
+# --- Mejor rol para cada jugador ---
+# Une los jugadores de todos los exports cargados (un jugador que aparece en
+# varios archivos cuenta una vez, con el primer valor disponible de cada métrica)
+# y los puntúa contra todos los roles de todos los grupos del plan, se haya subido
+# o no el archivo de ese grupo. Cada export se lee con las métricas de todos los
+# roles (el Parquet las guarda todas), así un extremo se mide en las métricas de
+# lateral igual que un lateral. Cada métrica se normaliza una vez sobre el conjunto
+# y cada rol se reescala a 0-100, así que los puntajes de roles distintos son
+# comparables. Una métrica que no trae un jugador (o ningún export) no puntúa 0:
+# el rol se calcula con las demás y sus pesos se reparten entre ellas.
+def pool_columns(plan):
+    columns = ['Player', 'Team', 'Position']
+    for group in plan:
+        columns += [metric for metric in plan.role_weights(group).metrics if metric not in columns]
+    return columns
+
+
+class BestRoleMatrix:
+    def __init__(self, frames, plan, method="minmax"):
+        # frames: {grupo: DataFrame con las columnas de pool_columns(plan) que traiga el export}
+        frames = [df for df in frames.values() if df is not None]
+        self.method = method
+
+        metrics = [metric for metric in pool_columns(plan)[3:] if any(metric in df.columns for df in frames)]
+        identity = pd.concat([df[['Player', 'Team', 'Position']].astype(str) for df in frames], ignore_index=True) \
+            if frames else pd.DataFrame(columns=['Player', 'Team', 'Position'])
+        values = pd.concat([df.reindex(columns=metrics) for df in frames], ignore_index=True) \
+            if frames else pd.DataFrame(columns=metrics)
+
+        codes, _ = pd.factorize(identity['Player'] + "\x00" + identity['Team'])
+        pooled = values.groupby(codes, sort=True).first()
+        first = np.unique(codes, return_index=True)[1] if len(codes) else np.empty(0, dtype=np.intp)
+        self.identity = identity.iloc[first].reset_index(drop=True)
+        values = pooled.reindex(columns=metrics).to_numpy(dtype=np.float64, na_value=np.nan)
+
+        # Pesos de todos los roles del plan sobre las columnas del conjunto (la última es el relleno)
+        column = {metric: j for j, metric in enumerate(metrics)}
+        self.roles = []
+        metric_index = []
+        weights = []
+        for group in plan:
+            role_weights = plan.role_weights(group)
+            position = np.array([column.get(metric, len(metrics)) for metric in role_weights.metrics] + [len(metrics)])
+            self.roles += [(group, role) for role in role_weights.roles]
+            metric_index.append(position[role_weights.metric_index])
+            weights.append(role_weights.weights)
+        width = max((index.shape[1] for index in metric_index), default=0)
+        metric_index = np.vstack([np.pad(index, ((0, 0), (0, width - index.shape[1])), constant_values=len(metrics))
+                                  for index in metric_index]) if metric_index else np.empty((0, 0), dtype=np.intp)
+        weights = np.vstack([np.pad(w, ((0, 0), (0, width - w.shape[1]))) for w in weights]) \
+            if weights else np.empty((0, 0))
+        self.labels = [role_label(group, role) for group, role in self.roles]
+
+        norm_values = normalize_values(values, method)
+        present = ~np.isnan(norm_values)
+        padded = np.hstack([np.where(present, norm_values, 0.0), np.zeros((len(norm_values), 1))])
+        padded_present = np.hstack([present, np.zeros((len(norm_values), 1))]).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = weighted_sum(padded, metric_index, weights) / weighted_sum(padded_present, metric_index, weights)
+        self.scores = normalize_matrix(scores)
+
+        # Roles de cada jugador de mejor a peor, y jugadores de cada rol de mejor a peor (sin puntaje al final)
+        self.player_order = np.argsort(-self.scores, axis=1, kind="stable")
+        self.role_order = np.argsort(-self.scores, axis=0, kind="stable")
+        self.best = self.player_order[:, 0] if len(self.roles) else np.empty(0, dtype=np.intp)
+
+    def memory_usage(self):
+        arrays = [self.scores, self.player_order, self.role_order]
+        return int(sum(array.nbytes for array in arrays) + self.identity.memory_usage(deep=True).sum())
+
+    def __len__(self):
+        return len(self.identity)
+
+    def built_from(self, sessions):
+        sessions = {group: session for group, session in sessions.items() if session is not None}
+        return sessions.keys() == self._sessions.keys() and \
+            all(self._sessions[group]() is session for group, session in sessions.items())
+
+    def memory_usage(self):
+        arrays = [self.scores, self.player_order, self.role_order]
+        return int(sum(array.nbytes for array in arrays) + self.identity.memory_usage(deep=True).sum())
+
+    def top_roles(self, k=3):
+        k = min(k, len(self.roles))
+        result = self.identity.copy()
+        rows = np.arange(len(self.identity))
+        top = self.player_order[:, :k]
+        labels = np.asarray(self.labels, dtype=object)
+        for i in range(k):
+            suffix = "" if i == 0 else f" {i + 1}"
+            result["Rol" + suffix] = labels[top[:, i]]
+            result["Puntaje" + suffix] = self.scores[rows, top[:, i]]
+        return result
+
+    def leaderboard(self, group, role, k=20):
+        r = self.roles.index((group, role))
+        rows = self.role_order[:k, r]
+        result = self.identity.iloc[rows].reset_index(drop=True)
+        result["Puntaje"] = self.scores[rows, r]
+        return result
+
+
+def best_role_matrix(sources, load, plan, cache, method="minmax"):
+    # sources: {grupo: clave de sus datos (hash del archivo o temporada y revisión de la base)};
+    # load(grupo) lee ese export con pool_columns(plan). Se recalcula solo cuando cambian
+    # los datos, el plan o la normalización; la matriz vive en la caché compartida.
+    key = ("mejor rol", tuple(sorted(sources.items())), plan.hash, method)
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = BestRoleMatrix({group: load(group) for group in sources}, plan, method)
+        cache.put(key, matrix)
+    return matrix
@@ -0,0 +1,290 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from datasets import DatasetCache, read_dataset
+from role_config import ROLES_PATH, RoleConfigError, load_plan
+from reports import REPORT_FORMATS, export_radars, radar_jobs
+from roles import position_groups
+from scoring import (ScoringSession, calculate_score_all_roles_wide, dataset_columns, filter_players,
+                     normalization_methods, top_rows)
+from store import STORE_PATH, PlayerStore
+from trends import TrendHistory
+
+
+# --- Puntuación por lotes sin Streamlit ---
+# python cli.py score <carpeta_exports> --out <carpeta_salida>
+# El grupo de posición de cada archivo se deduce de su nombre (p. ej.
+# "laliga_mid.xlsx", "premier-delanteros.xlsx") o se fuerza con --group.
+def detect_group(path, group=None):
+    if group is not None:
+        return group
+    stem = os.path.splitext(os.path.basename(path))[0].lower()
+    tokens = stem.replace("-", "_").replace(" ", "_").split("_")
+    for key in position_groups:
+        if key in tokens:
+            return key
+    return None
+
+
+def score_file(path, group, filter_params, method="minmax", roles_metrics=None, shrinkage=None, role_weights=None):
+    if roles_metrics is None:
+        roles_metrics = position_groups[group]["Roles"]
+    start = time.perf_counter()
+    df = read_dataset(path, dataset_columns(roles_metrics))
+    read_time = time.perf_counter() - start
+    missing = [col for col in dataset_columns(roles_metrics) if col not in df.columns]
+
+    start = time.perf_counter()
+    if shrinkage is None:
+        df_filtered = filter_players(df, filter_params)
+        df_score = None
+        if not df_filtered.empty:
+            df_score = calculate_score_all_roles_wide(df_filtered, roles_metrics, method, role_weights=role_weights)
+    else:
+        # La contracción usa la media de todo el export, como en la app, y después se filtra
+        df_score = ScoringSession(df, roles_metrics, role_weights=role_weights).score(filter_params, method, shrinkage)
+        df_score = df_score if len(df_score) else None
+    if df_score is not None:
+        df_score.insert(0, "Archivo", os.path.splitext(os.path.basename(path))[0])
+    score_time = time.perf_counter() - start
+    return df_score, len(df), read_time, score_time, missing
+
+
+def shrinkage_arg(value):
+    # --contraccion auto | <minutos>; 0 la desactiva
+    if value == "auto":
+        return value
+    try:
+        minutes = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("usa 'auto' o un número de minutos")
+    if minutes < 0:
+        raise argparse.ArgumentTypeError("los minutos no pueden ser negativos")
+    return minutes or None
+
+
+def load_roles(path):
+    try:
+        return load_plan(path)
+    except (OSError, RoleConfigError) as exc:
+        print(f"Configuración de roles no válida: {exc}", file=sys.stderr)
+        return None
+
+
+def write_table(df, out_dir, group, fmt):
+    path = os.path.join(out_dir, f"puntajes_{group}.{fmt}")
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def cmd_score(args):
+    plan = load_roles(args.roles)
+    if plan is None:
+        return 1
+    filter_params = {}
+    for column, option in (('Minutos jugados', args.minutos), ('Altura', args.altura), ('Edad', args.edad)):
+        if option is not None:
+            filter_params[column] = tuple(option)
+
+    jobs = []
+    for name in sorted(os.listdir(args.exports)):
+        path = os.path.join(args.exports, name)
+        if not name.lower().endswith((".xlsx", ".csv")) or not os.path.isfile(path):
+            continue
+        group = detect_group(path, args.group)
+        if group is None:
+            print(f"{name}: no se reconoce el grupo de posición, se omite", file=sys.stderr)
+            continue
+        jobs.append((path, group))
+    if not jobs:
+        print("No se encontraron exports .xlsx/.csv para puntuar", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.out, exist_ok=True)
+    results = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(score_file, path, group, filter_params, args.normalizacion, plan.roles(group),
+                                   args.contraccion, plan.role_weights(group)):
+                   (path, group) for path, group in jobs}
+        for future in as_completed(futures):
+            path, group = futures[future]
+            name = os.path.basename(path)
+            try:
+                df_score, n_rows, read_time, score_time, missing = future.result()
+            except Exception as exc:
+                print(f"{name}: error al puntuar ({exc})", file=sys.stderr)
+                continue
+            if missing:
+                print(f"{name}: faltan columnas, las métricas cuentan como 0: {', '.join(missing)}", file=sys.stderr)
+            if df_score is None:
+                print(f"{name:<40} {group:<11} sin jugadores tras los filtros")
+                continue
+            results.setdefault(group, []).append((path, df_score))
+            print(f"{name:<40} {group:<11} {n_rows:>7} filas  lectura {read_time:6.2f}s  puntuación {score_time:6.2f}s")
+
+    for group in position_groups:
+        if group not in results:
+            continue
+        frames = [df_score for _, df_score in sorted(results[group], key=lambda item: item[0])]
+        path = write_table(pd.concat(frames, ignore_index=True), args.out, group, args.format)
+        print(f"{position_groups[group]['Nombre']}: {path}")
+    print(f"Total: {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def cmd_ingest(args):
+    plan = load_roles(args.roles)
+    if plan is None:
+        return 1
+    store = PlayerStore(args.store)
+    for path in args.exports:
+        name = os.path.basename(path)
+        group = detect_group(path, args.group)
+        if group is None:
+            print(f"{name}: no se reconoce el grupo de posición, se omite", file=sys.stderr)
+            continue
+        start = time.perf_counter()
+        df = read_dataset(path, dataset_columns(plan.roles(group)))
+        counts = store.ingest(df, group, args.temporada, plan.roles(group))
+        print(f"{name:<40} {group:<11} {counts['nuevos']:>6} nuevos  {counts['actualizados']:>6} actualizados  "
+              f"{counts['sin cambios']:>6} sin cambios  {counts['eliminados']:>6} eliminados  "
+              f"{time.perf_counter() - start:6.2f}s")
+    return 0
+
+
+def cmd_radars(args):
+    plan = load_roles(args.roles)
+    if plan is None:
+        return 1
+    group = detect_group(args.export, args.group)
+    if group is None:
+        print(f"{os.path.basename(args.export)}: no se reconoce el grupo de posición, usa --group", file=sys.stderr)
+        return 1
+    roles_metrics = plan.roles(group)
+    session = ScoringSession(read_dataset(args.export, dataset_columns(roles_metrics)), roles_metrics,
+                             role_weights=plan.role_weights(group))
+
+    players = list(args.jugador or [])
+    if args.lista:
+        with open(args.lista, encoding="utf-8") as f:
+            players += [line.strip() for line in f if line.strip()]
+    if args.equipo:
+        team = session.identity['Team'] == args.equipo
+        players += session.identity.loc[team.to_numpy(dtype=bool, na_value=False), 'Player'].tolist()
+    if not players:
+        players = session.radar(args.normalizacion).players
+    roles = args.rol or list(roles_metrics)
+    unknown = [role for role in roles if role not in roles_metrics]
+    if unknown:
+        print(f"Roles desconocidos para {group}: {', '.join(unknown)}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    jobs = radar_jobs(session, players, roles, args.normalizacion, args.format)
+    n_files = export_radars(jobs, args.out, args.workers)
+    print(f"{n_files} radares en {args.out} ({time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+def cmd_trends(args):
+    plan = load_roles(args.roles)
+    if plan is None:
+        return 1
+    roles_metrics = plan.roles(args.group)
+    roles = [role.strip() for role in roles_metrics]
+    role = args.rol or roles[0]
+    if role not in roles:
+        print(f"Rol desconocido para {args.group}: {role}", file=sys.stderr)
+        return 1
+    store = PlayerStore(args.store)
+    history = TrendHistory(roles_metrics, args.normalizacion, {'Minutos jugados': (args.minutos, np.inf)},
+                           args.contraccion)
+    start = time.perf_counter()
+    seasons = history.sync_store(store, args.group, DatasetCache(), roles_metrics, plan.role_weights(args.group))
+    if len(seasons) < 2:
+        print(f"{position_groups[args.group]['Nombre']}: hacen falta al menos dos temporadas en la base "
+              f"({len(seasons)} encontradas)", file=sys.stderr)
+        return 1
+    table = history.trends(role, args.ventana, min_snapshots=2)
+    table = table.iloc[top_rows(table["Tendencia"].to_numpy(), len(table))]
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"{len(table)} jugadores, {len(seasons)} temporadas: {args.out} ({time.perf_counter() - start:.2f}s)")
+    else:
+        print(table.head(args.top).to_string(index=False))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Herramientas de scouting sin interfaz")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    score = subparsers.add_parser("score", help="Puntúa una carpeta de exports por grupo de posición")
+    score.add_argument("exports", help="Carpeta con los exports .xlsx o .csv")
+    score.add_argument("--out", required=True, help="Carpeta donde escribir una tabla Puntaje_* por grupo")
+    score.add_argument("--group", choices=list(position_groups), help="Grupo de posición para todos los archivos")
+    score.add_argument("--workers", type=int, default=os.cpu_count(), help="Procesos en paralelo")
+    score.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    score.add_argument("--normalizacion", choices=list(normalization_methods), default="minmax")
+    score.add_argument("--minutos", type=float, nargs=2, metavar=("MIN", "MAX"))
+    score.add_argument("--contraccion", type=shrinkage_arg, metavar="auto|MINUTOS",
+                       help="Acerca a la media las métricas de jugadores con pocos minutos (k fijo o estimado)")
+    score.add_argument("--altura", type=float, nargs=2, metavar=("MIN", "MAX"))
+    score.add_argument("--edad", type=float, nargs=2, metavar=("MIN", "MAX"))
+    score.add_argument("--roles", default=ROLES_PATH, help="Archivo JSON/YAML con los roles (por defecto, roles.py)")
+    score.set_defaults(func=cmd_score)
+
+    ingest = subparsers.add_parser("ingest", help="Guarda exports en la base de datos local")
+    ingest.add_argument("exports", nargs="+", help="Exports .xlsx o .csv a importar")
+    ingest.add_argument("--temporada", required=True, help="Temporada de los exports, p. ej. 2024-25")
+    ingest.add_argument("--group", choices=list(position_groups), help="Grupo de posición para todos los archivos")
+    ingest.add_argument("--store", default=STORE_PATH, help="Ruta del archivo SQLite")
+    ingest.add_argument("--roles", default=ROLES_PATH, help="Archivo JSON/YAML con los roles (por defecto, roles.py)")
+    ingest.set_defaults(func=cmd_ingest)
+
+    radars = subparsers.add_parser("radars", help="Exporta radares de una lista de jugadores a un zip")
+    radars.add_argument("export", help="Export .xlsx o .csv")
+    radars.add_argument("--out", required=True, help="Archivo .zip de salida")
+    radars.add_argument("--group", choices=list(position_groups), help="Grupo de posición del archivo")
+    radars.add_argument("--jugador", action="append", help="Jugador a incluir (se puede repetir)")
+    radars.add_argument("--lista", help="Archivo de texto con un jugador por línea")
+    radars.add_argument("--equipo", help="Incluye a todos los jugadores de este equipo")
+    radars.add_argument("--rol", action="append", help="Rol a dibujar (se puede repetir; por defecto, todos)")
+    radars.add_argument("--format", choices=REPORT_FORMATS, default="png")
+    radars.add_argument("--normalizacion", choices=list(normalization_methods), default="minmax")
+    radars.add_argument("--workers", type=int, default=os.cpu_count(), help="Procesos en paralelo")
+    radars.add_argument("--roles", default=ROLES_PATH, help="Archivo JSON/YAML con los roles (por defecto, roles.py)")
+    radars.set_defaults(func=cmd_radars)
+
+    trends = subparsers.add_parser("trends", help="Evolución de un rol entre las temporadas de la base local")
+    trends.add_argument("--group", choices=list(position_groups), required=True)
+    trends.add_argument("--rol", help="Rol a seguir (por defecto, el primero del grupo)")
+    trends.add_argument("--minutos", type=float, default=0, help="Minutos jugados mínimos en cada temporada")
+    trends.add_argument("--ventana", type=int, default=3, help="Temporadas de la media móvil y la tendencia")
+    trends.add_argument("--normalizacion", choices=list(normalization_methods), default="minmax")
+    trends.add_argument("--contraccion", type=shrinkage_arg, metavar="auto|MINUTOS")
+    trends.add_argument("--store", default=STORE_PATH, help="Ruta del archivo SQLite")
+    trends.add_argument("--out", help="CSV de salida (por defecto, los primeros --top en pantalla)")
+    trends.add_argument("--top", type=int, default=20)
+    trends.add_argument("--roles", default=ROLES_PATH, help="Archivo JSON/YAML con los roles (por defecto, roles.py)")
+    trends.set_defaults(func=cmd_trends)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
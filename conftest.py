@@ -0,0 +1 @@
+# Hace importables los módulos de la app (scoring, roles, ...) desde tests/
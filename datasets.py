@@ -0,0 +1,413 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from roles import column_map, position_groups
+from scoring import CompactDataset, ScoringSession, dataset_columns
+
+DATA_DIR = os.environ.get("SCOUTING_DATA_DIR", "datos_importados")
+
+
+# --- Caché de datasets y resultados ---
+# Cada archivo subido se identifica por el hash de su contenido, de modo que el
+# Excel se parsea una sola vez y la tabla y el radar reciben el mismo DataFrame.
+# La app comparte una sola caché entre todos los usuarios del proceso: las
+# entradas se expulsan por antigüedad (LRU) al pasar de max_entries o de
+# max_bytes. Con `directory` las tablas de puntajes también se guardan en disco
+# (hasta max_disk_bytes) y sobreviven a un reinicio o se comparten entre procesos.
+CACHE_DIR = os.environ.get("SCOUTING_CACHE_DIR")
+CACHE_MAX_BYTES = int(float(os.environ.get("SCOUTING_CACHE_MB", "2048")) * 2 ** 20)
+# Tope del directorio en disco: al pasarlo se borran las tablas leídas hace más tiempo
+CACHE_MAX_DISK_BYTES = int(float(os.environ.get("SCOUTING_CACHE_DISK_MB", "1024")) * 2 ** 20)
+
+
+def entry_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage())
+    return 0
+
+
+class DatasetCache:
+    def __init__(self, max_entries=10, max_bytes=None, directory=None, max_disk_bytes=CACHE_MAX_DISK_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        # Los grupos se cargan en paralelo desde el planificador y la caché es compartida
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            value = self._entries[key]
+        # Una sesión crece con los resultados que guarda: se vuelve a medir en cada acceso.
+        # Se mide fuera del candado de la caché porque la sesión toma el suyo, y una
+        # sesión que está puntuando puede estar esperando a la caché (load_frame/save_frame)
+        size = entry_size(value)
+        with self._lock:
+            if key in self._sizes:
+                self._sizes[key] = size
+                self._evict()
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = entry_size(value)
+            self._evict()
+
+    def _evict(self):
+        # Expulsamos el dataset usado hace más tiempo (LRU); la entrada más reciente se queda siempre
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or
+                                          (self.max_bytes is not None and self.nbytes() > self.max_bytes)):
+            key, _ = self._entries.popitem(last=False)
+            del self._sizes[key]
+
+    def nbytes(self):
+        return sum(self._sizes.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {"entradas": len(self._entries), "bytes": self.nbytes(), "aciertos": self.hits,
+                    "fallos": self.misses, "aciertos en disco": self.disk_hits}
+
+    def _frame_path(self, key):
+        name = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, name + ".parquet")
+
+    def load_frame(self, key):
+        if self.directory is None or _parquet() is None:
+            return None
+        path = self._frame_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_parquet(path)
+            # La fecha de modificación hace de marca de último uso para _prune_disk
+            os.utime(path)
+        except OSError:
+            # Otro proceso la ha borrado al podar el directorio
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        return df
+
+    def save_frame(self, key, df):
+        if self.directory is None or _parquet() is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._frame_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        self._prune_disk()
+
+    def _prune_disk(self):
+        # LRU por fecha de modificación sobre todo el directorio (puede compartirse entre procesos)
+        if self.max_disk_bytes is None:
+            return
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".parquet"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+def roles_hash(roles_metrics):
+    # Cambia si cambian los roles, sus métricas o sus pesos
+    return hashlib.sha256(json.dumps(roles_metrics, sort_keys=True).encode()).hexdigest()
+
+
+def file_hash(uploaded_file):
+    return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+
+
+# --- Lectura por bloques ---
+# Los exports se leen en bloques de CHUNK_ROWS filas (openpyxl en modo read_only o
+# read_csv con chunksize). De cada bloque solo se conservan las columnas que usa
+# algún rol, las métricas se pasan a float32 y se acumulan mínimo, máximo y
+# recuento por métrica, así los límites de normalización están listos al terminar.
+CHUNK_ROWS = 50000
+TEXT_COLUMNS = ['Player', 'Team', 'Position']
+
+
+def all_role_columns():
+    columns = []
+    for group in position_groups.values():
+        for column in dataset_columns(group["Roles"]):
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+class MetricStats:
+    def __init__(self):
+        self.min = {}
+        self.max = {}
+        self.count = {}
+
+    def update(self, chunk):
+        for column in chunk.columns:
+            if column in TEXT_COLUMNS:
+                continue
+            values = chunk[column].to_numpy()
+            valid = values[~np.isnan(values)]
+            self.count[column] = self.count.get(column, 0) + len(valid)
+            if len(valid) == 0:
+                continue
+            self.min[column] = min(self.min.get(column, np.inf), float(valid.min()))
+            self.max[column] = max(self.max.get(column, -np.inf), float(valid.max()))
+
+    def bounds(self):
+        return {column: (self.min[column], self.max[column]) for column in self.min}
+
+    def to_dict(self):
+        return {"min": self.min, "max": self.max, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.min, stats.max, stats.count = data["min"], data["max"], data["count"]
+        return stats
+
+
+def _source_name(source):
+    return str(getattr(source, "name", source)).lower()
+
+
+def _typed_chunk(chunk):
+    for column in chunk.columns:
+        if column in TEXT_COLUMNS:
+            chunk[column] = chunk[column].astype("string")
+        else:
+            chunk[column] = pd.to_numeric(chunk[column], errors="coerce").astype(np.float32)
+    return chunk
+
+
+def _iter_excel_rows(source, chunk_size):
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        block = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            block.append(row)
+            if len(block) == chunk_size:
+                yield header, block
+                block = []
+        if block:
+            yield header, block
+    finally:
+        workbook.close()
+
+
+def iter_export_chunks(source, columns=None, chunk_size=CHUNK_ROWS, stats=None):
+    # Acepta un archivo subido en Streamlit o una ruta en disco, .xlsx o .csv
+    if columns is None:
+        columns = all_role_columns()
+    wanted = set(columns)
+    renamed = {v: k for k, v in column_map.items()}
+    if hasattr(source, "getvalue"):
+        name, source = _source_name(source), io.BytesIO(source.getvalue())
+    else:
+        name = _source_name(source)
+
+    if name.endswith(".csv"):
+        chunks = pd.read_csv(source, usecols=lambda col: renamed.get(col, col) in wanted, chunksize=chunk_size)
+        for chunk in chunks:
+            chunk = _typed_chunk(chunk.rename(columns=renamed))
+            if stats is not None:
+                stats.update(chunk)
+            yield chunk
+        return
+
+    for header, block in _iter_excel_rows(source, chunk_size):
+        positions = [i for i, col in enumerate(header) if renamed.get(col, col) in wanted]
+        data = {renamed.get(header[i], header[i]): [row[i] if i < len(row) else None for row in block] for i in positions}
+        chunk = _typed_chunk(pd.DataFrame(data))
+        if stats is not None:
+            stats.update(chunk)
+        yield chunk
+
+
+def read_export(source, columns=None, chunk_size=CHUNK_ROWS):
+    stats = MetricStats()
+    chunks = list(iter_export_chunks(source, columns, chunk_size, stats))
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df, stats
+
+
+def read_dataset(source, columns=None):
+    return read_export(source, columns)[0]
+
+
+def _parquet():
+    # pyarrow tarda en importarse; solo se carga cuando hace falta leer o escribir Parquet
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:  # sin pyarrow se vuelve a leer el Excel en cada sesión
+        return None
+    return pq
+
+
+# --- Formato columnar en disco ---
+# La primera vez que se sube un export se convierte a Parquet en DATA_DIR; las
+# sesiones siguientes leen (con memory-map) solo las columnas que usan los roles.
+# La conversión escribe bloque a bloque, sin tener el export entero en memoria, y
+# guarda al lado los mínimos/máximos por métrica y las columnas que se buscaron;
+# si una configuración de roles nueva pide otras columnas, se vuelve a convertir.
+def import_dataset(uploaded_file, key, columns=None):
+    import pyarrow as pa
+    pq = _parquet()
+
+    wanted = all_role_columns()
+    wanted += [col for col in columns or [] if col not in wanted]
+    path = os.path.join(DATA_DIR, key + ".parquet")
+    meta = _read_meta(key)
+    if os.path.exists(path) and meta is not None and set(wanted) <= set(meta.get("columnas", [])):
+        return path
+    if meta is not None:
+        wanted += [col for col in meta.get("columnas", []) if col not in wanted]
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    stats = MetricStats()
+    writer = None
+    try:
+        for chunk in iter_export_chunks(uploaded_file, wanted, stats=stats):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    # Como el parquet: otro hilo puede estar leyendo las estadísticas de este mismo archivo
+    stats_path = os.path.join(DATA_DIR, key + ".stats.json")
+    tmp_stats = f"{stats_path}.{threading.get_ident()}.tmp"
+    with open(tmp_stats, "w") as f:
+        json.dump({**stats.to_dict(), "columnas": wanted}, f)
+    # Primero el parquet: unas estadísticas con columnas nuevas nunca acompañan a un parquet viejo
+    os.replace(tmp_path, path)
+    os.replace(tmp_stats, stats_path)
+    return path
+
+
+def _read_meta(key):
+    path = os.path.join(DATA_DIR, key + ".stats.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_stats(key):
+    meta = _read_meta(key)
+    return MetricStats.from_dict(meta) if meta is not None else None
+
+
+def _read_imported(uploaded_file, file_key, columns=None):
+    pq = _parquet()
+    if pq is None:
+        return read_dataset(uploaded_file, columns)
+    path = import_dataset(uploaded_file, file_key, columns)
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [col for col in columns if col in available]
+    return pd.read_parquet(path, columns=columns, memory_map=True)
+
+
+def read_imported(uploaded_file, columns=None):
+    # Lectura puntual del Parquet del export, sin guardar el DataFrame en la caché
+    return _read_imported(uploaded_file, file_hash(uploaded_file), columns)
+
+
+def load_dataset(uploaded_file, cache, columns=None):
+    file_key = file_hash(uploaded_file)
+    key = (file_key, tuple(columns) if columns is not None else None)
+    df = cache.get(key)
+    if df is None:
+        df = _read_imported(uploaded_file, file_key, columns)
+        cache.put(key, df)
+    return df
+
+
+def load_scoring_session(uploaded_file, cache, roles_metrics, progress=None, role_weights=None):
+    # La sesión guarda su propio CompactDataset; el DataFrame leído no se queda en la caché.
+    # progress(etapa) avisa de "lectura" y "columnas" (lo usa la ingesta en segundo
+    # plano); se llama también cuando la sesión ya estaba en la caché
+    if progress is not None:
+        progress("lectura")
+    file_key = file_hash(uploaded_file)
+    key = (file_key, "session", roles_hash(roles_metrics))
+    session = cache.get(key)
+    if session is None:
+        df = _read_imported(uploaded_file, file_key, dataset_columns(roles_metrics))
+        if progress is not None:
+            progress("columnas")
+        data = CompactDataset(df, roles_metrics, role_weights)
+        del df
+        stats = load_stats(file_key)
+        session = ScoringSession(data, roles_metrics, stats.bounds() if stats is not None else None)
+        session.attach_cache(cache, key)
+        cache.put(key, session)
+    elif progress is not None:
+        progress("columnas")
+    return session
+
+
+def load_store_session(store, group, season, cache, roles_metrics=None, role_weights=None):
+    # La revisión cambia al reimportar, así que una temporada actualizada no se sirve desde la caché
+    if roles_metrics is None:
+        roles_metrics = position_groups[group]["Roles"]
+    key = ("store", store.path, group, season, store.revision(group, season), roles_hash(roles_metrics))
+    session = cache.get(key)
+    if session is None:
+        df = store.query(group, season, columns=dataset_columns(roles_metrics))
+        if df.empty:
+            return None
+        session = ScoringSession(df, roles_metrics, role_weights=role_weights)
+        session.attach_cache(cache, key)
+        cache.put(key, session)
+    return session
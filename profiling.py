@@ -0,0 +1,152 @@
+import contextlib
+import json
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+_NOOP = contextlib.nullcontext()
+
+# tracemalloc es de todo el proceso y la app atiende a varios usuarios: se
+# arranca con el primer recorder que lo activa y se para con el último que lo
+# desactiva (solo si lo arrancamos nosotros).
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_started_tracing = False
+# Etapas en curso en todo el proceso: el pico de memoria solo es de una etapa
+# si ninguna otra se ha solapado con ella
+_active_stages = set()
+
+
+def _acquire_tracing():
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        _tracing_users += 1
+        if _tracing_users == 1 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+
+
+def _release_tracing():
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+# --- Medición de etapas por rerun ---
+# Con el recorder desactivado stage() devuelve siempre el mismo contexto vacío,
+# así que instrumentar el código no cuesta nada. Activado, cada etapa guarda su
+# tiempo de reloj y el pico de memoria (tracemalloc) que alcanzó el proceso
+# mientras duraba. El pico es aproximado (cuenta todo lo que asigna el proceso)
+# y se descarta si otra etapa medida, de esta sesión o de otra, corrió a la vez.
+class StageRecorder:
+    def __init__(self, max_runs=20):
+        self.enabled = False
+        self.runs = deque(maxlen=max_runs)
+        self._lock = threading.Lock()
+
+    def enable(self, enabled):
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        if enabled:
+            _acquire_tracing()
+        else:
+            _release_tracing()
+
+    def __del__(self):
+        # Una sesión que se cierra con la medición activa deja de contar
+        if self.enabled:
+            self.enabled = False
+            _release_tracing()
+
+    def start_run(self):
+        if self.enabled:
+            with self._lock:
+                self.runs.append({"inicio": time.time(), "reloj": time.perf_counter(), "etapas": []})
+
+    def finish_run(self):
+        if self.enabled and self.runs:
+            run = self.runs[-1]
+            self._record(run, {"etapa": "total", "grupo": None, "inicio": 0.0,
+                               "segundos": time.perf_counter() - run["reloj"], "pico_bytes": None,
+                               "hilo": threading.current_thread().name})
+
+    def stage(self, name, group=None):
+        if not self.enabled or not self.runs:
+            return _NOOP
+        return _Stage(self, self.runs[-1], name, group)
+
+    def _record(self, run, record):
+        with self._lock:
+            run["etapas"].append(record)
+
+    def last_run(self):
+        return list(self.runs[-1]["etapas"]) if self.runs else []
+
+    def log(self):
+        # Una línea JSON por etapa y rerun
+        lines = []
+        for i, run in enumerate(self.runs):
+            for record in run["etapas"]:
+                lines.append(json.dumps({"rerun": i, "fecha": run["inicio"], **record}))
+        return "\n".join(lines) + "\n"
+
+    def trace(self):
+        # Formato Trace Event: se abre en chrome://tracing o en Perfetto
+        events = []
+        threads = {}
+        for i, run in enumerate(self.runs):
+            for record in run["etapas"]:
+                events.append({
+                    "name": record["etapa"] if record["grupo"] is None else f"{record['etapa']} ({record['grupo']})",
+                    "cat": record["grupo"] or "rerun",
+                    "ph": "X",
+                    "ts": (run["inicio"] + record["inicio"]) * 1e6,
+                    "dur": record["segundos"] * 1e6,
+                    "pid": i,
+                    "tid": threads.setdefault(record["hilo"], len(threads)),
+                    "args": {"pico_bytes": record["pico_bytes"], "hilo": record["hilo"]},
+                })
+        return json.dumps({"traceEvents": events})
+
+
+class _Stage:
+    def __init__(self, recorder, run, name, group):
+        self.recorder = recorder
+        self.run = run
+        self.name = name
+        self.group = group
+
+    def __enter__(self):
+        self.memory = None
+        with _tracing_lock:
+            self.overlapped = bool(_active_stages)
+            for stage in _active_stages:
+                stage.overlapped = True
+            _active_stages.add(self)
+            if not self.overlapped and tracemalloc.is_tracing():
+                self.memory = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        peak = None
+        with _tracing_lock:
+            _active_stages.discard(self)
+            if self.memory is not None and not self.overlapped and tracemalloc.is_tracing():
+                peak = max(0, tracemalloc.get_traced_memory()[1] - self.memory)
+        self.recorder._record(self.run, {
+            "etapa": self.name,
+            "grupo": self.group,
+            "inicio": self.start - self.run["reloj"],
+            "segundos": seconds,
+            "pico_bytes": peak,
+            "hilo": threading.current_thread().name,
+        })
+        return False
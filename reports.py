@@ -0,0 +1,112 @@
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+REPORT_FORMATS = ["png", "pdf"]
+SMALL_BATCH = 16
+
+
+# --- Radares por lotes ---
+# Cada trabajo lleva ya los valores normalizados del radar (los mismos que usa
+# la pestaña Radar), así que los procesos solo dibujan con matplotlib en modo
+# Agg, sin navegador ni DataFrames. Las imágenes se escriben en el zip a medida
+# que terminan.
+def radar_jobs(session, players, roles, method="minmax", fmt="png"):
+    radar = session.radar(method)
+    jobs = []
+    for role in roles:
+        metrics = session.roles_metrics[role]["Metrics"]
+        found, values = radar.player_values(players, metrics)
+        for player, row in zip(found, values):
+            jobs.append((player, role.strip(), list(metrics), [float(v) for v in row], fmt))
+    return jobs
+
+
+def _file_name(player, role, fmt):
+    name = re.sub(r"[^\w\-]+", "_", f"{player}_{role}", flags=re.UNICODE).strip("_")
+    return f"{name}.{fmt}"
+
+
+# Los procesos de export_radars reutilizan una figura por número de métricas:
+# entre radares solo cambian los datos. Dibujando en el propio proceso (la app,
+# con varios usuarios en hilos) cada radar usa una figura nueva; se crean con
+# matplotlib.figure.Figure, sin pyplot, que no es seguro entre hilos.
+_figures = {}
+_reuse_figures = False
+
+
+def _init_worker():
+    global _reuse_figures
+    _reuse_figures = True
+
+
+def _radar_figure(n_metrics):
+    if _reuse_figures and n_metrics in _figures:
+        return _figures[n_metrics]
+    import numpy as np
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(6, 6))
+    ax = fig.add_subplot(polar=True)
+    fig.subplots_adjust(left=0.15, right=0.85, bottom=0.1, top=0.85)
+    angles = np.linspace(0, 2 * np.pi, n_metrics, endpoint=False)
+    closed = np.r_[angles, angles[:1]]  # cerrar círculo
+    line, = ax.plot(closed, np.zeros(len(closed)), linewidth=2)
+    fill, = ax.fill(closed, np.zeros(len(closed)), alpha=0.25)
+    ax.set_xticks(angles)
+    ax.set_ylim(0, 100)
+    figure = (fig, ax, closed, line, fill)
+    if _reuse_figures:
+        _figures[n_metrics] = figure
+    return figure
+
+
+def render_radar(job):
+    player, role, metrics, values, fmt = job
+    fig, ax, closed, line, fill = _radar_figure(len(metrics))
+    values = [0.0 if v != v else v for v in values]  # NaN -> 0, como en el radar de la app
+    values = values + values[:1]
+    line.set_data(closed, values)
+    fill.set_xy(list(zip(closed, values)))
+    ax.set_xticklabels(metrics, fontsize=7)
+    ax.set_title(f"{player} - Rol: {role}", pad=20)
+    buffer = io.BytesIO()
+    # Compresión PNG rápida: el zip se genera en segundos a cambio de archivos algo mayores
+    options = {"pil_kwargs": {"compress_level": 1}} if fmt == "png" else {}
+    fig.savefig(buffer, format=fmt, **options)
+    return _file_name(player, role, fmt), buffer.getvalue()
+
+
+def export_radars(jobs, out, workers=None):
+    # out: ruta del zip o un archivo abierto (p. ej. BytesIO para la descarga en la app).
+    # Con pocos radares arrancar procesos cuesta más que dibujarlos aquí mismo.
+    if workers is None:
+        workers = os.cpu_count() or 1
+    names = set()
+    with zipfile.ZipFile(out, "w") as archive:
+        if workers <= 1 or len(jobs) < SMALL_BATCH:
+            images = map(render_radar, jobs)
+            executor = None
+        else:
+            # spawn: el proceso que exporta puede tener hilos (Streamlit, planificador)
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                           initializer=_init_worker)
+            images = executor.map(render_radar, jobs, chunksize=4)
+        try:
+            for name, data in images:
+                # Dos jugadores con el mismo nombre no se pisan en el zip
+                base, ext = os.path.splitext(name)
+                i = 1
+                while name in names:
+                    i += 1
+                    name = f"{base}_{i}{ext}"
+                names.add(name)
+                # PNG y PDF ya van comprimidos
+                archive.writestr(name, data, compress_type=zipfile.ZIP_STORED)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    return len(names)
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+from collections import namedtuple
+
+from datasets import roles_hash
+from roles import position_groups, role_descriptions
+from scoring import compile_role_weights
+
+# Archivo JSON o YAML con la definición de roles; sin él se usan los de roles.py
+ROLES_PATH = os.environ.get("SCOUTING_ROLES_PATH")
+
+
+class RoleConfigError(ValueError):
+    pass
+
+
+# --- Plan de puntuación ---
+# La configuración de roles se valida y se compila una sola vez: pesos
+# normalizados a suma 1 y la matriz de índices/pesos de cada rol sobre la lista
+# de métricas distintas del grupo. Las sesiones reciben esa matriz y solo la
+# llevan a las columnas de su dataset (restrict_role_weights), sin recompilar.
+GroupPlan = namedtuple("GroupPlan", ["roles_metrics", "descriptions", "role_weights"])
+
+
+class ScoringPlan:
+    def __init__(self, groups, source=None):
+        self.groups = groups
+        self.source = source
+        self.hash = roles_hash({group: plan.roles_metrics for group, plan in groups.items()})
+
+    def __iter__(self):
+        return iter(self.groups)
+
+    def roles(self, group):
+        return self.groups[group].roles_metrics
+
+    def descriptions(self, group):
+        return self.groups[group].descriptions
+
+    def role_weights(self, group):
+        return self.groups[group].role_weights
+
+
+def _validate_role(where, role):
+    if not isinstance(role, dict) or "Metrics" not in role or "Weights" not in role:
+        raise RoleConfigError(f"{where}: cada rol necesita 'Metrics' y 'Weights'")
+    metrics, weights = role["Metrics"], role["Weights"]
+    if not isinstance(metrics, list) or not metrics or not all(isinstance(m, str) and m for m in metrics):
+        raise RoleConfigError(f"{where}: 'Metrics' debe ser una lista no vacía de nombres de columna")
+    if len(set(metrics)) != len(metrics):
+        raise RoleConfigError(f"{where}: métricas repetidas")
+    if not isinstance(weights, list) or len(weights) != len(metrics):
+        raise RoleConfigError(f"{where}: {len(metrics)} métricas y "
+                              f"{len(weights) if isinstance(weights, list) else 'ningún'} pesos")
+    if not all(isinstance(w, (int, float)) and not isinstance(w, bool) and w >= 0 for w in weights):
+        raise RoleConfigError(f"{where}: los pesos deben ser números no negativos")
+    total = float(sum(weights))
+    if total <= 0:
+        raise RoleConfigError(f"{where}: la suma de los pesos debe ser positiva")
+    return {"Metrics": list(metrics), "Weights": [w / total for w in weights]}
+
+
+def compile_plan(config, source=None):
+    if not isinstance(config, dict) or not config:
+        raise RoleConfigError("La configuración debe asociar cada grupo de posición con sus roles")
+    groups = {}
+    for group, group_config in config.items():
+        if group not in position_groups:
+            raise RoleConfigError(f"Grupo desconocido: {group} (válidos: {', '.join(position_groups)})")
+        roles = group_config.get("Roles") if isinstance(group_config, dict) else None
+        if not isinstance(roles, dict) or not roles:
+            raise RoleConfigError(f"{group}: falta el diccionario 'Roles'")
+        roles_metrics = {role: _validate_role(f"{group} / {role}", spec) for role, spec in roles.items()}
+        descriptions = group_config.get("Descripciones", {})
+        if not isinstance(descriptions, dict):
+            raise RoleConfigError(f"{group}: 'Descripciones' debe asociar cada rol con su descripción")
+        for role, desc in descriptions.items():
+            if role not in roles_metrics:
+                raise RoleConfigError(f"{group}: descripción de un rol que no existe: {role}")
+            if not isinstance(desc, dict) or not {"Nombre", "Descripción", "Posición"} <= set(desc):
+                raise RoleConfigError(f"{group} / {role}: la descripción necesita 'Nombre', 'Descripción' y 'Posición'")
+        metrics = []
+        for role in roles_metrics.values():
+            metrics += [metric for metric in role["Metrics"] if metric not in metrics]
+        groups[group] = GroupPlan(roles_metrics, descriptions, compile_role_weights(roles_metrics, metrics))
+    return ScoringPlan(groups, source)
+
+
+def default_config():
+    return {
+        group: {
+            "Roles": spec["Roles"],
+            "Descripciones": {role: desc for role, desc in role_descriptions.items() if role in spec["Roles"]},
+        }
+        for group, spec in position_groups.items()
+    }
+
+
+def read_config(path):
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise RoleConfigError("Para leer roles en YAML hace falta PyYAML (pip install pyyaml)")
+            try:
+                return yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise RoleConfigError(f"{path}: {e}")
+        try:
+            return json.load(f)
+        except json.JSONDecodeError as e:
+            raise RoleConfigError(f"{path}: {e}")
+
+
+def load_plan(path=None):
+    if path is None:
+        return compile_plan(default_config())
+    # Los grupos que no aparecen en el archivo conservan los roles de roles.py
+    config = read_config(path)
+    if not isinstance(config, dict):
+        raise RoleConfigError(f"{path}: la configuración debe asociar cada grupo de posición con sus roles")
+    return compile_plan({**default_config(), **config}, source=path)
+
+
+# --- Recarga en caliente ---
+# get() compara la fecha de modificación del archivo y solo recompila si cambió.
+# Si la nueva versión no es válida se conserva el último plan correcto y el
+# error queda en `error` para mostrarlo.
+class PlanLoader:
+    def __init__(self, path=ROLES_PATH):
+        self.path = path
+        self.error = None
+        self._plan = load_plan() if path is None else None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self.path is None:
+            return self._plan
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime != self._mtime:
+                    self._mtime = mtime
+                    self._plan = load_plan(self.path)
+                    self.error = None
+            except (OSError, RoleConfigError) as e:
+                self.error = str(e)
+            if self._plan is None:
+                self._plan = load_plan()
+            return self._plan
@@ -0,0 +1,167 @@
+# --- Mapeo de columnas ---
+column_map = {
+    'Minutos jugados': 'Minutes played',
+    'Altura': 'Height',
+    'Edad': 'Age'
+}
+
+# --- Roles y métricas mediocampistas ---
+roles_metrics_mid = {
+    "Box Crashers": {
+        "Metrics": ["xG per 90", "xA", "Successful dribbles, %", "Dribbles per 90", "Touches in box per 90", "Progressive runs per 90"],
+        "Weights": [0.25, 0.2, 0.1, 0.15, 0.2, 0.1]
+    },
+    "Creator": {
+        "Metrics": ["Key passes per 90", "xG per 90", "xA", "Passes to final third per 90", "Progressive passes per 90", "Long passes per 90"],
+        "Weights": [0.3, 0.25, 0.2, 0.1, 0.1, 0.05]
+    },
+    "Orchestrator ": {
+        "Metrics": ["Passes per 90", "Accurate passes, %", "Short / medium passes per 90", "PAdj Interceptions", "Successful defensive actions per 90", "Key passes per 90", "Defensive duels won, %"],
+        "Weights": [0.25, 0.2, 0.15, 0.15, 0.1, 0.1, 0.05]
+    },
+    "Box to Box": {
+        "Metrics": ["Progressive passes per 90", "Defensive duels won, %", "PAdj Interceptions", "Successful defensive actions per 90", "xG per 90", "Received passes per 90"],
+        "Weights": [0.25, 0.2, 0.2, 0.15, 0.1, 0.1]
+    },
+    "Distributor": {
+        "Metrics": ["Passes per 90", "Accurate passes, %", "Forward passes per 90", "Accurate forward passes, %", "Passes to final third per 90", "Long passes per 90"],
+        "Weights": [0.25, 0.2, 0.2, 0.15, 0.1, 0.1]
+    },
+    "Builder": {
+        "Metrics": ["Passes per 90", "Accurate passes, %", "Defensive duels won, %", "Successful defensive actions per 90", "PAdj Interceptions", "Progressive passes per 90"],
+        "Weights": [0.3, 0.25, 0.15, 0.1, 0.15, 0.05]
+    },
+    "Defensive Mid": {
+        "Metrics": ["Defensive duels won, %", "Aerial duels won, %", "PAdj Sliding tackles", "PAdj Interceptions", "Successful defensive actions per 90"],
+        "Weights": [0.4, 0.1, 0.2, 0.2, 0.1]
+    }
+}
+
+# --- Roles y métricas defensas centrales ---
+roles_metrics_cbs = {
+    "Ball playing CB": {
+        "Metrics": ["Accurate long passes, %", "Passes to final third per 90", "Deep completions per 90", "Progressive passes per 90",
+                    "Passes per 90", "Aerial duels won, %", "Defensive duels won, %"],
+        "Weights": [0.15, 0.2, 0.075, 0.15, 0.325, 0.05, 0.05]
+    },
+    "Defensive CB": {
+        "Metrics": ["Defensive duels won, %", "Aerial duels won, %", "PAdj Sliding tackles", "PAdj Interceptions",
+                    "Successful defensive actions per 90"],
+        "Weights": [0.3, 0.2, 0.2, 0.2, 0.1]
+    },
+    "Wide CB": {
+        "Metrics": ["Progressive passes per 90", "Progressive runs per 90", "Passes per 90", "Defensive duels won, %",
+                    "Accurate short / medium passes, %", "Accurate long passes, %"],
+        "Weights": [0.125, 0.275, 0.2, 0.2, 0.15, 0.05]
+    }
+}
+
+roles_metrics_wingers = {
+    "Inverted Winger": {
+        "Metrics": ["Shots per 90", "xG per 90", "Touches in box per 90", "Successful dribbles, %", "Shot assists per 90", "Deep completed crosses per 90", "Accurate short / medium passes, %" ],
+        "Weights": [0.3, 0.15, 0.15, 0.15, 0.1, 0.1, 0.05]
+    },
+    "Traditional Winger": {
+        "Metrics": ["Shot assists per 90", "Successful dribbles, %", "Deep completed crosses per 90", "Accelerations per 90", "xA" , "Accurate crosses, %"],
+        "Weights": [0.2, 0.175, 0.225, 0.2, 0.1, 0.1]
+    },
+    "Playmaking Winger": {
+        "Metrics": ["Key passes per 90", "Shot assists per 90","Passes to final third per 90", "Deep completions per 90", "Progressive passes per 90", "Smart passes per 90", "Second assists per 90", "Third assists per 90"],
+        "Weights": [0.25, 0.1, 0.1, 0.1, 0.15, 0.2, 0.05, 0.05]
+    },
+    "Inside Forward": {
+        "Metrics": ["Touches in box per 90", "xG per 90", "Progressive runs per 90", "Goals per 90","Successful dribbles, %", "Goal conversion, %", "xA"],
+        "Weights": [0.2, 0.2, 0.1, 0.15, 0.1, 0.1, 0.15]
+    }
+}
+
+roles_metrics_laterales = {
+    "Attacking FB": {
+        "Metrics": ["Passes to penalty area per 90", "Passes to final third per 90", "Progressive runs per 90", "Offensive duels won, %",
+                    "Successful dribbles, %", "xA per 90", "Accelerations per 90", "Accurate crosses, %"],
+        "Weights": [0.075, 0.075, 0.05, 0.325, 0.15, 0.1, 0.05, 0.1]
+    },
+    "Inverted FB": {
+        "Metrics": ["Passes per 90", "Smart passes per 90", "Through passes per 90", "Progressive passes per 90",
+                    "PAdj Sliding tackles", "PAdj Interceptions", "Short / medium passes per 90", "Defensive duels won, %"],
+        "Weights": [0.35, 0.075, 0.1, 0.2, 0.05, 0.05, 0.125, 0.05]
+    },
+    "Defensive FB": {
+        "Metrics": ["Defensive duels won, %", "Aerial duels won, %", "PAdj Sliding tackles", "PAdj Interceptions"],
+        "Weights": [0.55, 0.15, 0.15, 0.15]
+    }
+}
+
+roles_metrics_delanteros = {
+
+
+    "Second Striker": {
+        "Metrics": ["xG per 90", "Touches in box per 90", "Non-penalty goals per 90", "xA", "Goal conversion, %", "Successful dribbles, %", "Progressive runs per 90" ],
+        "Weights": [0.2, 0.2, 0.15, 0.15, 0.1, 0.1, 0.1]
+    },
+    "Deep-Lying Striker": {
+        "Metrics": ["xG per 90", "Non-penalty goals per 90", "Deep completions per 90", "Received passes per 90", "Assists per 90" , "Shot assists per 90", "Second assists per 90", "Third assists per 90"],
+        "Weights": [0.125, 0.125, 0.15, 0.15, 0.15, 0.05, 0.025, 0.125]
+    },
+    "Target Man": {
+        "Metrics": ["Touches in box per 90", "Aerial duels won, %","xG per 90", "Shots on target, %", "Non-penalty goals per 90"],
+        "Weights": [0.1, 0.425, 0.225, 0.2, 0.05]
+    },
+    "Playmaking Striker": {
+        "Metrics": ["Short / medium passes per 90", "Received passes per 90", "Shot assists per 90", "Key passes per 90","xG per 90", "Non-penalty goals per 90", "Offensive duels won, %"],
+        "Weights": [0.25, 0.25, 0.1, 0.1, 0.1, 0.1, 0.1]
+    },
+    "Advanced Striker": {
+        "Metrics": ["Accelerations per 90", "Touches in box per 90", "Progressive runs per 90", "Goals per 90","xG per 90", "Goal conversion, %", "xA", "Successful dribbles, %"],
+        "Weights": [0.2, 0.1, 0.2, 0.1, 0.1, 0.1, 0.1, 0.1]
+    }
+}
+
+# --- Diccionario con nombres, descripción y número típico de posición ---
+role_descriptions = {
+    "Box Crashers": {
+        "Nombre": "Interior Llegador",
+        "Descripción": "Mediocampista con alta capacidad de irrumpir en el área rival. Aporta en generación ofensiva, conducción y finalización.",
+        "Posición": "8 / 10"
+    },
+    "Creator": {
+        "Nombre": "Creador de Juego",
+        "Descripción": "Centrado en generar ocasiones de gol desde zonas avanzadas. Preciso en pases clave, visión ofensiva.",
+        "Posición": "10 / 8"
+    },
+    "Orchestrator ": {
+        "Nombre": "Organizador de Medio Campo",
+        "Descripción": "Controla el ritmo del partido. Distribuye el balón con precisión y colabora en tareas defensivas.",
+        "Posición": "6 / 8"
+    },
+    "Box to Box": {
+        "Nombre": "Volante Mixto",
+        "Descripción": "Participa tanto en defensa como en ataque. Recorre grandes distancias y tiene impacto en ambas áreas.",
+        "Posición": "8"
+    },
+    "Distributor": {
+        "Nombre": "Distribuidor de Juego",
+        "Descripción": "Especialista en circulación y distribución. Preciso en pases hacia el frente y cambios de orientación.",
+        "Posición": "6 / 8"
+    },
+    "Builder": {
+        "Nombre": "Constructor desde Atrás",
+        "Descripción": "Inicia la jugada desde zonas más retrasadas. Seguro con el balón y fuerte en tareas defensivas básicas.",
+        "Posición": "5 / 6"
+    },
+    "Defensive Mid": {
+        "Nombre": "Mediocentro Defensivo",
+        "Descripción": "Recuperador puro. Interrumpe el juego rival y protege la zona delante de la defensa.",
+        "Posición": "6"
+    }
+}
+
+
+# --- Grupos de posición: clave del uploader -> roles del grupo ---
+position_groups = {
+    "mid": {"Nombre": "Mediocampistas", "Roles": roles_metrics_mid},
+    "cbs": {"Nombre": "Centrales", "Roles": roles_metrics_cbs},
+    "wingers": {"Nombre": "Extremos", "Roles": roles_metrics_wingers},
+    "laterales": {"Nombre": "Laterales", "Roles": roles_metrics_laterales},
+    "delanteros": {"Nombre": "Delanteros", "Roles": roles_metrics_delanteros},
+}
@@ -0,0 +1,126 @@
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+
+# --- Planificador de puntuación ---
+# Cada rerun envía un trabajo por grupo de posición (leer el export, filtrar,
+# puntuar y preparar el radar) y los cinco corren en paralelo en hilos: las
+# sesiones quedan en memoria de este proceso y NumPy/pyarrow liberan el GIL.
+# Cada envío abre una generación nueva; los trabajos de una generación anterior
+# que aún no empezaron se cancelan y los que están en marcha se detienen en su
+# siguiente check().
+class ScoringScheduler:
+    def __init__(self, max_workers=5):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scoring")
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._futures = []
+
+    def submit(self, jobs):
+        # jobs: {nombre: función(check)} -> {nombre: Future}
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            for future in self._futures:
+                future.cancel()
+            futures = {name: self._executor.submit(self._run, generation, job) for name, job in jobs.items()}
+            self._futures = list(futures.values())
+        return futures
+
+    def _run(self, generation, job):
+        def check():
+            if self._generation != generation:
+                raise CancelledError()
+
+        check()
+        return job(check)
+
+    def gather(self, futures):
+        return {name: future.result() for name, future in futures.items()}
+
+
+# --- Ingesta de archivos en segundo plano ---
+# Cada archivo subido se procesa en cuanto llega, sin esperar a que se pinte su
+# pestaña: lectura e importación, matriz compacta, normalización y puntuación
+# del pool completo. Las tareas no dependen de los reruns (solo se sustituyen
+# cuando cambia el archivo de ese grupo), y su etapa y progreso se consultan
+# sin bloquear.
+class IngestTask:
+    def __init__(self, key, stages):
+        self.key = key
+        self.stages = stages
+        self.stage = None
+        self.completed = 0
+        self.error = None
+        self.cancelled = False
+        self.started = time.perf_counter()
+        self.finished = None
+        self.future = None
+
+    def advance(self, stage):
+        # Marca el inicio de una etapa (las anteriores quedan completas); se detiene si el archivo ya se sustituyó
+        if self.cancelled:
+            raise CancelledError()
+        self.completed = self.stages.index(stage)
+        self.stage = stage
+
+    @property
+    def ready(self):
+        return self.future.done() and self.error is None and not self.future.cancelled()
+
+    @property
+    def progress(self):
+        if self.future.done():
+            return 1.0
+        return self.completed / len(self.stages)
+
+    def result(self):
+        return self.future.result() if self.ready else None
+
+
+class IngestPipeline:
+    def __init__(self, stages, max_workers=5):
+        self.stages = stages
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingesta")
+        self._lock = threading.Lock()
+        self._tasks = {}
+
+    def submit(self, name, key, job, retry_failed=True):
+        # job(task) -> resultado; se lanza solo si `name` no tiene ya una tarea con esa clave.
+        # Con retry_failed una tarea con esa clave que falló se relanza: el error pudo ser pasajero
+        with self._lock:
+            task = self._tasks.get(name)
+            if task is not None and task.key == key and not task.future.cancelled() and \
+                    (task.error is None or not retry_failed):
+                return task
+            if task is not None:
+                task.cancelled = True
+                task.future.cancel()
+            task = IngestTask(key, self.stages)
+            task.future = self._executor.submit(self._run, task, job)
+            self._tasks[name] = task
+        return task
+
+    def _run(self, task, job):
+        try:
+            result = job(task)
+        except CancelledError:
+            raise
+        except Exception as exc:
+            task.error = exc
+            raise
+        finally:
+            task.finished = time.perf_counter()
+        task.completed = len(task.stages)
+        return result
+
+    def discard(self, name):
+        with self._lock:
+            task = self._tasks.pop(name, None)
+            if task is not None:
+                task.cancelled = True
+                task.future.cancel()
+
+    def status(self, name):
+        return self._tasks.get(name)
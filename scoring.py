@@ -0,0 +1,605 @@
+import threading
+import warnings
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from roles import column_map
+
+
+# Columnas que necesita un grupo de posición: identidad, filtros y métricas de sus roles
+def dataset_columns(roles_metrics):
+    columns = ['Player', 'Team', 'Position'] + list(column_map.keys())
+    for role in roles_metrics.values():
+        for metric in role["Metrics"]:
+            if metric not in columns:
+                columns.append(metric)
+    return columns
+
+
+# --- Índice de rangos para filtros ---
+# Cada columna numérica se ordena una sola vez por dataset; un filtro por rango o
+# por igualdad se resuelve con searchsorted sobre los valores ordenados y devuelve
+# posiciones de fila, sin crear copias intermedias del DataFrame.
+class FilterIndex:
+    def __init__(self, df, columns=tuple(column_map.keys())):
+        self.df = df
+        self._sorted = {}
+        for column in columns:
+            if column in df.columns:
+                self.add_column(column)
+
+    def add_column(self, column):
+        # Permite filtrar por cualquier métrica numérica, p. ej. {"xG per 90": (0.3, np.inf)}
+        if column not in self._sorted:
+            # Se ordena en el tipo guardado (float32 en un CompactDataset): los límites del
+            # filtro se llevan a ese tipo en positions(), igual que al comparar en pandas
+            series = self.df[column]
+            dtype = np.float32 if series.dtype == np.float32 else np.float64
+            values = series.to_numpy(dtype=dtype, na_value=np.nan)
+            order = np.argsort(values, kind="stable")
+            self._sorted[column] = (values[order], order)
+
+    def positions(self, column, value):
+        if column not in self._sorted:
+            if not pd.api.types.is_numeric_dtype(self.df[column]):
+                condition = self.df[column] == value
+                return np.flatnonzero(condition.to_numpy(dtype=bool, na_value=False))
+            self.add_column(column)
+        sorted_values, order = self._sorted[column]
+        if isinstance(value, tuple):
+            min_value, max_value = value
+        elif pd.isna(value):
+            return order[:0]
+        else:
+            min_value = max_value = value
+        min_value, max_value = sorted_values.dtype.type(min_value), sorted_values.dtype.type(max_value)
+        # Los NaN quedan al final del orden y nunca caen dentro del rango
+        start = np.searchsorted(sorted_values, min_value, side="left")
+        stop = np.searchsorted(sorted_values, max_value, side="right")
+        return order[start:stop]
+
+    def mask(self, filter_params):
+        hits = np.zeros(len(self.df), dtype=np.intp)
+        n_filters = 0
+        for column, value in filter_params.items():
+            if column in self.df.columns:
+                hits[self.positions(column, value)] += 1
+                n_filters += 1
+        return hits == n_filters
+
+    def lookup(self, filter_params):
+        return np.flatnonzero(self.mask(filter_params))
+
+
+def filter_players(df, filter_params, index=None):
+    if index is None:
+        mask = np.ones(len(df), dtype=bool)
+        for column, value in filter_params.items():
+            if column in df.columns:
+                if isinstance(value, tuple):
+                    min_value, max_value = value
+                    condition = (df[column] >= min_value) & (df[column] <= max_value)
+                else:
+                    condition = df[column] == value
+                mask &= condition.to_numpy(dtype=bool, na_value=False)
+        return df[mask]
+    return df.iloc[index.lookup(filter_params)]
+
+# --- Estrategias de normalización ---
+# min-max es el comportamiento original; el rango percentil y el z-score robusto
+# evitan que un valor atípico aplaste al resto de jugadores.
+normalization_methods = {
+    "minmax": "Min-max",
+    "percentile": "Rango percentil",
+    "robust": "Z-score robusto",
+}
+
+
+def normalize_series(series, method="minmax"):
+    if method != "minmax":
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)[:, None]
+        return pd.Series(normalize_values(values, method)[:, 0], index=series.index)
+    min_val, max_val = series.min(), series.max()
+    if max_val > min_val:
+        return (series - min_val) / (max_val - min_val) * 100
+    else:
+        return series * 0 + 50
+
+def normalize_matrix(values, min_val=None, max_val=None):
+    # Igual que normalize_series, pero columna a columna sobre una matriz.
+    # Si se pasan los límites se usan en lugar del mínimo/máximo de values.
+    if min_val is None:
+        if values.shape[0] == 0:
+            return values.astype(np.float64)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            min_val, max_val = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+    valid = max_val > min_val
+    span = np.where(valid, max_val - min_val, 1.0)
+    return np.where(valid, (values - min_val) / span * 100, values * 0 + 50)
+
+
+def percentile_matrix(values, order=None):
+    # Rango percentil 0-100 con empates promediados. order es el argsort de cada
+    # columna con los NaN al final; si ya está calculado no se vuelve a ordenar.
+    if order is None:
+        order = np.argsort(values, axis=0, kind="stable")
+    result = np.full(values.shape, np.nan)
+    for j in range(values.shape[1]):
+        rows = order[:, j]
+        sorted_values = values[rows, j]
+        n_valid = np.count_nonzero(~np.isnan(sorted_values))
+        if n_valid == 0:
+            continue
+        rows, sorted_values = rows[:n_valid], sorted_values[:n_valid]
+        if n_valid == 1:
+            result[rows, j] = 50
+            continue
+        starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+        ends = np.r_[starts[1:], n_valid] - 1
+        result[rows, j] = np.repeat((starts + ends) / 2, ends - starts + 1) / (n_valid - 1) * 100
+    return result
+
+
+def robust_matrix(values, clip=3.0):
+    # (x - mediana) / (1.4826 * MAD), recortado a +-clip y llevado a 0-100. Si la mitad
+    # de los jugadores comparte un valor (p. ej. los ceros de Goals per 90 en centrales)
+    # el MAD es 0: se usa la desviación absoluta media (x 1.2533) para que la métrica
+    # siga contando. Solo una columna constante queda en 50.
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(values, axis=0)
+        deviation = np.abs(values - median)
+        mad = np.nanmedian(deviation, axis=0) * 1.4826
+        scale = np.where(mad > 0, mad, np.nanmean(deviation, axis=0) * 1.2533)
+    valid = scale > 0
+    z = (values - median) / np.where(valid, scale, 1.0)
+    return np.where(valid, np.clip(50 + z * (50 / clip), 0, 100), values * 0 + 50)
+
+
+# --- Contracción por minutos (Bayes empírico) ---
+# Las métricas por 90 de un jugador con pocos minutos son ruidosas. Antes de
+# normalizar, cada valor se acerca a la media de la población (ponderada por
+# minutos) con peso w = m / (m + k): con k minutos el valor propio y la media
+# pesan lo mismo. Con shrinkage="auto" k se estima por métrica: la desviación
+# cuadrática respecto a la media crece como tau² + c / m (varianza real entre
+# jugadores más ruido de muestreo), y una regresión lineal sobre 1 / m da
+# k = c / tau². Con un número se usa ese k para todas las métricas.
+SHRINKAGE_MIN_MINUTES = 90
+
+
+def shrinkage_strength(values, minutes, min_minutes=SHRINKAGE_MIN_MINUTES):
+    valid = ~np.isnan(values) & (minutes >= min_minutes)[:, None]
+    count = valid.sum(axis=0)
+    z = np.where(valid, 1.0 / np.maximum(minutes, min_minutes)[:, None], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight_minutes = np.where(valid, minutes[:, None], 0.0)
+        mean = (np.where(valid, values, 0.0) * weight_minutes).sum(axis=0) / weight_minutes.sum(axis=0)
+        y = np.where(valid, (values - mean) ** 2, 0.0)
+        mean_z = z.sum(axis=0) / count
+        mean_y = y.sum(axis=0) / count
+        var_z = (z * z).sum(axis=0) / count - mean_z ** 2
+        slope = ((z * y).sum(axis=0) / count - mean_z * mean_y) / var_z
+        slope = np.where(var_z > 0, np.maximum(slope, 0.0), 0.0)
+        tau2 = mean_y - slope * mean_z
+        # Sin varianza real entre jugadores (tau² <= 0) todo es ruido: contracción máxima
+        k = np.where(tau2 > 0, slope / tau2, np.inf)
+    return np.where(count >= 3, k, 0.0)
+
+
+def shrink_values(values, minutes, k):
+    # values: jugadores x métricas; minutes: por jugador (NaN cuenta como 0); k: escalar o por métrica
+    minutes = np.nan_to_num(np.asarray(minutes, dtype=np.float64), nan=0.0)
+    present = ~np.isnan(values)
+    weight_minutes = np.where(present, minutes[:, None], 0.0)
+    total = weight_minutes.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        prior = (np.where(present, values, 0.0) * weight_minutes).sum(axis=0) / total
+        # Sin minutos registrados, media simple
+        prior = np.where(total > 0, prior, np.where(present, values, 0.0).sum(axis=0) / present.sum(axis=0))
+        k = np.broadcast_to(np.asarray(k, dtype=np.float64), (values.shape[1],))
+        w = np.where(np.isinf(k), 0.0, minutes[:, None] / (minutes[:, None] + k))
+        w = np.where(k == 0, 1.0, w)
+    # Los valores ausentes siguen ausentes
+    return w * values + (1 - w) * prior
+
+
+# Opciones de la interfaz: None desactiva la contracción
+shrinkage_modes = {
+    None: "Sin contracción",
+    "auto": "Bayes empírico (k por métrica)",
+    450: "k = 450 minutos",
+    900: "k = 900 minutos",
+    1800: "k = 1800 minutos",
+}
+
+
+def apply_shrinkage(values, minutes, shrinkage):
+    if shrinkage is None or minutes is None:
+        return values
+    values = np.asarray(values, dtype=np.float64)
+    k = shrinkage_strength(values, minutes) if shrinkage == "auto" else float(shrinkage)
+    return shrink_values(values, minutes, k)
+
+
+def normalize_values(values, method="minmax", order=None):
+    if method == "minmax":
+        return normalize_matrix(values)
+    if method == "percentile":
+        return percentile_matrix(values, order)
+    if method == "robust":
+        return robust_matrix(values)
+    raise ValueError(f"Método de normalización desconocido: {method}")
+
+
+# --- Matriz de pesos por rol ---
+# Cada rol se compila a una fila de índices de métricas y otra de pesos, en el
+# mismo orden que su lista "Metrics". Las métricas ausentes del export apuntan a
+# una columna de ceros, así que sumar en ese orden da exactamente el mismo
+# resultado que el bucle métrica a métrica.
+RoleWeights = namedtuple("RoleWeights", ["metrics", "roles", "metric_index", "weights"])
+
+
+def compile_role_weights(roles_metrics, columns):
+    columns = set(columns)
+    metrics = []
+    for role in roles_metrics.values():
+        for metric in role["Metrics"]:
+            if metric in columns and metric not in metrics:
+                metrics.append(metric)
+    position = {metric: i for i, metric in enumerate(metrics)}
+
+    roles = list(roles_metrics.keys())
+    width = max((len(role["Metrics"]) for role in roles_metrics.values()), default=0)
+    metric_index = np.full((len(roles), width), len(metrics), dtype=np.intp)
+    weights = np.zeros((len(roles), width))
+    for r, role in enumerate(roles):
+        present = [(position[m], w) for m, w in zip(roles_metrics[role]["Metrics"], roles_metrics[role]["Weights"])
+                   if m in position]
+        for k, (i, w) in enumerate(present):
+            metric_index[r, k] = i
+            weights[r, k] = w
+    return RoleWeights(metrics, roles, metric_index, weights)
+
+
+def restrict_role_weights(role_weights, columns):
+    # Pesos ya compilados (p. ej. los del plan de roles) llevados a las columnas de un
+    # dataset: las métricas que no trae apuntan a la columna de ceros del relleno
+    columns = set(columns)
+    metrics = [metric for metric in role_weights.metrics if metric in columns]
+    position = np.full(len(role_weights.metrics) + 1, len(metrics), dtype=np.intp)
+    where = {metric: j for j, metric in enumerate(metrics)}
+    for i, metric in enumerate(role_weights.metrics):
+        if metric in where:
+            position[i] = where[metric]
+    return RoleWeights(metrics, role_weights.roles, position[role_weights.metric_index], role_weights.weights)
+
+
+def resolve_role_weights(roles_metrics, columns, role_weights=None):
+    if role_weights is None:
+        return compile_role_weights(roles_metrics, columns)
+    return restrict_role_weights(role_weights, columns)
+
+
+def weighted_sum(padded_values, metric_index, weights):
+    scores = np.zeros((padded_values.shape[0], weights.shape[0]))
+    for k in range(metric_index.shape[1]):
+        scores += padded_values[:, metric_index[:, k]] * weights[:, k]
+    return scores
+
+
+def score_matrix(norm_values, role_weights):
+    # norm_values: jugadores x métricas ya normalizadas -> jugadores x roles
+    padded = np.hstack([norm_values, np.zeros((norm_values.shape[0], 1))])
+    return weighted_sum(padded, role_weights.metric_index, role_weights.weights)
+
+
+def build_score_frame(identity, scores, role_weights, deduplicate=True):
+    if deduplicate:
+        identity = identity.drop_duplicates()
+    score_columns = ["Puntaje_" + role.strip() for role in role_weights.roles]
+    df_final = pd.DataFrame(scores, columns=score_columns)
+    df_final.index = pd.RangeIndex(len(identity))
+    return pd.concat([identity.reset_index(drop=True), df_final], axis=1)
+
+
+# Puntúa el DataFrame ya filtrado. La contracción por minutos necesita la media de
+# todo el export, no la del subconjunto: para eso está ScoringSession.score.
+def calculate_score_all_roles_wide(df, roles_metrics, method="minmax", role_weights=None):
+    role_weights = resolve_role_weights(roles_metrics, df.columns, role_weights)
+    values = df[role_weights.metrics].to_numpy(dtype=np.float64, na_value=np.nan)
+    # Cada métrica se normaliza una sola vez, aunque la usen varios roles
+    scores = score_matrix(normalize_values(values, method), role_weights)
+    # Normalizamos puntaje final para cada rol
+    scores = normalize_matrix(scores)
+    return build_score_frame(df[['Player', 'Team', 'Position']], scores, role_weights)
+
+
+# Posiciones de las n filas con mayor valor, de mayor a menor. argpartition solo
+# sirve para hallar el valor de corte: se toman todas las filas que lo igualan o lo
+# mejoran y se ordenan por (valor, fila), así los NaN van al final, los empates
+# conservan el orden de las filas y el resultado coincide con un argsort estable.
+def top_rows(values, n, descending=True):
+    values = np.asarray(values, dtype=np.float64)
+    n = min(n, len(values))
+    key = -values if descending else values.copy()
+    key[np.isnan(key)] = np.inf
+    if n <= 0:
+        return np.empty(0, dtype=np.intp)
+    if n < len(values):
+        threshold = key[np.argpartition(key, n - 1)[n - 1]]
+        rows = np.flatnonzero(key <= threshold)
+    else:
+        rows = np.arange(len(values))
+    return rows[np.lexsort((rows, key[rows]))][:n]
+
+
+# --- Matriz de radar ---
+# Métricas normalizadas sobre todo el dataset más un índice nombre -> fila, de modo
+# que los valores de cada jugador seleccionado se leen sin recorrer el DataFrame.
+class RadarMatrix:
+    def __init__(self, players, metrics, norm_values):
+        self.metrics = list(metrics)
+        self._column = {metric: j for j, metric in enumerate(self.metrics)}
+        # Columna de ceros al final para las métricas que no están en el export
+        self.values = np.hstack([norm_values, np.zeros((norm_values.shape[0], 1))]).astype(np.float32)
+        first = ~players.duplicated()
+        self.players = players[first].tolist()
+        self._row = dict(zip(self.players, np.flatnonzero(first.to_numpy())))
+
+    def row(self, player):
+        return self._row.get(player)
+
+    def column(self, metric):
+        return self._column.get(metric, len(self.metrics))
+
+    def player_values(self, players, metrics):
+        # Filas: jugadores encontrados (primera aparición, como antes); columnas: métricas del rol
+        found = [player for player in players if player in self._row]
+        rows = [self._row[player] for player in found]
+        columns = [self.column(metric) for metric in metrics]
+        return found, self.values[np.ix_(rows, columns)]
+
+
+# --- Dataset compacto ---
+# Lo que guarda una sesión por dataset: identidad como categóricas y un único bloque
+# float32 (columnas de filtro + métricas de los roles, en orden de columna) del que
+# las métricas son una vista. Las columnas que ningún rol usa no se guardan.
+IDENTITY_COLUMNS = ['Player', 'Team', 'Position']
+
+
+class CompactDataset:
+    def __init__(self, df, roles_metrics, role_weights=None):
+        self.roles_metrics = roles_metrics
+        self.role_weights = resolve_role_weights(roles_metrics, df.columns, role_weights)
+        self.identity = pd.DataFrame({col: pd.Categorical(df[col]) for col in IDENTITY_COLUMNS})
+        self.filter_columns = [col for col in column_map if col in df.columns]
+
+        numeric = self.filter_columns + self.role_weights.metrics
+        self._column = {col: j for j, col in enumerate(numeric)}
+        self.values = np.empty((len(df), len(numeric)), dtype=np.float32, order="F")
+        for j, col in enumerate(numeric):
+            self.values[:, j] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+        self.metrics = self.values[:, len(self.filter_columns):]
+        self.columns = IDENTITY_COLUMNS + numeric
+        self.index = FilterIndex(self)
+
+    def __len__(self):
+        return len(self.identity)
+
+    def __getitem__(self, column):
+        if column in self.identity.columns:
+            return self.identity[column]
+        return pd.Series(self.values[:, self._column[column]], name=column, copy=False)
+
+    def lookup(self, filter_params):
+        # Posiciones de las filas que cumplen los filtros
+        return self.index.lookup(filter_params)
+
+    def memory_usage(self):
+        return int(self.values.nbytes + self.identity.memory_usage(deep=True).sum())
+
+
+# --- Sesión de puntuación incremental ---
+# Se construye una vez por dataset y solo renormaliza las métricas (y los roles)
+# cuyos límites cambian al mover los sliders. Las métricas normalizadas y los
+# radares se guardan en float32, como el bloque del CompactDataset; el resultado
+# coincide con filter_players + calculate_score_all_roles_wide salvo el redondeo
+# de float32 (del orden de 1e-5 sobre la escala 0-100).
+class ScoringSession:
+    def __init__(self, data, roles_metrics, base_bounds=None, role_weights=None):
+        # role_weights: pesos compilados del plan de roles (si no, se compilan aquí)
+        if not isinstance(data, CompactDataset):
+            data = CompactDataset(data, roles_metrics, role_weights)
+        self.data = data
+        self.roles_metrics = roles_metrics
+        self.identity = data.identity
+        self.index = data.index
+        # Sin duplicados en el dataset completo tampoco los hay en ningún subconjunto
+        self._has_duplicates = bool(self.identity.duplicated().any())
+        self.role_weights = data.role_weights
+        self.values = data.metrics
+
+        n_rows, n_metrics = self.values.shape
+        # Orden de cada métrica (ver order); solo lo necesita el rango percentil
+        self._order = None
+
+        self._min = np.full(n_metrics, np.nan)
+        self._max = np.full(n_metrics, np.nan)
+        self._stale = np.ones(n_metrics, dtype=bool)
+        # Métricas normalizadas para todas las filas, más la columna de ceros del relleno
+        self._norm = np.zeros((n_rows, n_metrics + 1), dtype=np.float32)
+        self._raw_scores = np.zeros((n_rows, len(self.role_weights.roles)))
+        # Límites de todo el dataset ya conocidos (p. ej. acumulados al leer el export)
+        self._base_bounds = None
+        if base_bounds is not None and all(metric in base_bounds for metric in self.role_weights.metrics):
+            self._base_bounds = (np.array([base_bounds[m][0] for m in self.role_weights.metrics], dtype=np.float64),
+                                 np.array([base_bounds[m][1] for m in self.role_weights.metrics], dtype=np.float64))
+        # Últimos resultados por (filtros, normalización): volver a un ajuste anterior es inmediato
+        self._results = OrderedDict()
+        self._radar = {}
+        self._shrunk = {}
+        self._leaderboards = OrderedDict()
+        # Caché compartida (y quizá en disco) de tablas de puntajes; ver attach_cache
+        self._result_cache = None
+        self._cache_key = None
+        # score() modifica el estado incremental; un rerun nuevo puede solaparse con uno cancelado
+        self._lock = threading.RLock()
+
+    def attach_cache(self, cache, key):
+        # key identifica el dataset y la configuración de roles (hash del archivo y de los roles)
+        self._result_cache = cache
+        self._cache_key = key
+
+    def missing_metrics(self):
+        # Métricas de los roles que el dataset no trae: puntúan 0
+        present = set(self.role_weights.metrics)
+        missing = []
+        for role in self.roles_metrics.values():
+            missing += [metric for metric in role["Metrics"] if metric not in present and metric not in missing]
+        return missing
+
+    def memory_usage(self):
+        # La caché compartida la mide desde otros hilos mientras score() modifica los diccionarios
+        with self._lock:
+            arrays = [self._norm, self._raw_scores] + ([self._order] if self._order is not None else [])
+            size = self.data.memory_usage() + sum(array.nbytes for array in arrays)
+            size += sum(int(df.memory_usage().sum()) for df in self._results.values())
+            size += sum(radar.values.nbytes for radar in self._radar.values())
+            size += sum(values.nbytes for values in self._shrunk.values())
+            return size
+
+    @property
+    def order(self):
+        # argsort de cada métrica con los NaN al final, en int32: se construye la primera vez que se pide
+        with self._lock:
+            if self._order is None:
+                order_type = np.int32 if len(self.values) < 2 ** 31 else np.intp
+                self._order = np.argsort(self.values, axis=0, kind="stable").astype(order_type, order="F")
+            return self._order
+
+    def bounds(self, mask):
+        if self._base_bounds is not None and mask.all():
+            return self._base_bounds
+        if not mask.any():
+            return np.full(self.values.shape[1], np.nan), np.full(self.values.shape[1], np.nan)
+        subset = self.values[mask]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanmin(subset, axis=0).astype(np.float64), np.nanmax(subset, axis=0).astype(np.float64)
+
+    def _update_bounds(self, min_val, max_val):
+        same = ((min_val == self._min) | (np.isnan(min_val) & np.isnan(self._min))) & \
+               ((max_val == self._max) | (np.isnan(max_val) & np.isnan(self._max)))
+        changed = np.flatnonzero(~same | self._stale)
+        if len(changed) == 0:
+            return
+        self._norm[:, changed] = normalize_matrix(self.values[:, changed], min_val[changed], max_val[changed])
+        self._min, self._max = min_val, max_val
+        self._stale[:] = False
+
+        # Solo se recalculan los roles que usan alguna métrica renormalizada
+        metric_index = self.role_weights.metric_index
+        roles = np.flatnonzero(np.isin(metric_index, changed).any(axis=1))
+        self._raw_scores[:, roles] = weighted_sum(self._norm, metric_index[roles], self.role_weights.weights[roles])
+
+    def _subset_order(self, mask):
+        # Orden de cada métrica restringido al subconjunto, sin volver a ordenar
+        keep = mask[self.order]
+        n_rows = np.count_nonzero(mask)
+        rows = self.order.T[keep.T].reshape(self.values.shape[1], n_rows).T
+        return (np.cumsum(mask) - 1)[rows]
+
+    def normalized(self, mask, method="minmax"):
+        # Métricas normalizadas (filas del subconjunto x métricas)
+        if method == "minmax":
+            # Sin tocar los límites incrementales que usa score()
+            return normalize_matrix(self.values[mask], *self.bounds(mask))
+        if method == "percentile":
+            if mask.all():
+                # Radar sobre todo el dataset: ordenar una vez no compensa guardar el orden
+                return percentile_matrix(self.values, self._order)
+            return percentile_matrix(self.values[mask], self._subset_order(mask))
+        return normalize_values(self.values[mask].astype(np.float64), method)
+
+    def shrunk(self, shrinkage):
+        # Métricas contraídas hacia la media de todo el dataset, una vez por modo
+        with self._lock:
+            if shrinkage not in self._shrunk:
+                minutes = None
+                if 'Minutos jugados' in self.data.filter_columns:
+                    minutes = self.data['Minutos jugados'].to_numpy(dtype=np.float64)
+                self._shrunk[shrinkage] = apply_shrinkage(self.values, minutes, shrinkage)
+            return self._shrunk[shrinkage]
+
+    def radar(self, method="minmax"):
+        # Se calcula una vez por dataset y normalización y lo comparten todos los reruns
+        with self._lock:
+            if method not in self._radar:
+                norm_values = self.normalized(np.ones(len(self.values), dtype=bool), method)
+                self._radar[method] = RadarMatrix(self.identity["Player"], self.role_weights.metrics, norm_values)
+            return self._radar[method]
+
+    def score(self, filter_params, method="minmax", shrinkage=None):
+        with self._lock:
+            return self._score(filter_params, method, shrinkage)
+
+    def _score(self, filter_params, method, shrinkage=None):
+        key = (tuple(filter_params.items()), method)
+        if shrinkage is not None:
+            key += (shrinkage,)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            return result
+
+        stored_key = None
+        if self._result_cache is not None:
+            stored_key = (self._cache_key, key)
+            result = self._result_cache.load_frame(stored_key)
+            if result is not None:
+                self._remember(key, result)
+                return result
+
+        mask = self.index.mask(filter_params)
+        if shrinkage is not None:
+            # Los valores contraídos no sirven para los límites incrementales: se normaliza el subconjunto
+            raw_scores = score_matrix(normalize_values(self.shrunk(shrinkage)[mask], method), self.role_weights)
+        elif method == "minmax":
+            if mask.any():
+                self._update_bounds(*self.bounds(mask))
+            raw_scores = self._raw_scores[mask]
+        else:
+            raw_scores = score_matrix(self.normalized(mask, method), self.role_weights)
+        # Normalizamos puntaje final para cada rol dentro del subconjunto filtrado
+        scores = normalize_matrix(raw_scores)
+        result = build_score_frame(self.identity[mask], scores, self.role_weights, self._has_duplicates)
+        if stored_key is not None:
+            self._result_cache.save_frame(stored_key, result)
+        self._remember(key, result)
+        return result
+
+    def _remember(self, key, result):
+        self._results[key] = result
+        if len(self._results) > 8:
+            self._results.popitem(last=False)
+
+    def leaderboard(self, filter_params, role, n=20, method="minmax", shrinkage=None):
+        # Top n del rol sobre la tabla filtrada; se guarda por (filtros, normalización, contracción, rol, n)
+        key = (tuple(filter_params.items()), method, shrinkage, role, n)
+        with self._lock:
+            result = self._leaderboards.get(key)
+            if result is not None:
+                self._leaderboards.move_to_end(key)
+                return result
+            df_score = self._score(filter_params, method, shrinkage)
+            column = "Puntaje_" + role.strip()
+            rows = top_rows(df_score[column].to_numpy(), n)
+            result = df_score.iloc[rows][['Player', 'Team', 'Position', column]].rename(columns={column: "Puntaje"})
+            result.index = pd.RangeIndex(1, len(result) + 1)
+            self._leaderboards[key] = result
+            if len(self._leaderboards) > 64:
+                self._leaderboards.popitem(last=False)
+            return result
@@ -0,0 +1,89 @@
+import weakref
+
+import numpy as np
+
+# Por debajo de este tamaño se calcula la distancia exacta a todos los jugadores;
+# por encima se usa (y se guarda) un NeighbourIndex por bloques en float32.
+BRUTE_FORCE_ROWS = 20000
+
+_indexes = weakref.WeakKeyDictionary()
+
+
+# --- Índice de vecinos por bloques ---
+# Guarda los vectores ya escalados por la raíz de los pesos del rol y sus normas
+# al cuadrado, de modo que la distancia ponderada de cada bloque se reduce a un
+# producto matricial: |x - q|^2 = |x|^2 - 2 x·q + |q|^2.
+class NeighbourIndex:
+    def __init__(self, vectors, block_size=8192):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        self.block_size = block_size
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def query(self, query_vector, k=10, exclude=None):
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        query_norm = float(query_vector @ query_vector)
+        best_rows = np.empty(0, dtype=np.intp)
+        best_dist = np.empty(0, dtype=np.float32)
+        for start in range(0, len(self.vectors), self.block_size):
+            block = self.vectors[start:start + self.block_size]
+            dist = self.sq_norms[start:start + len(block)] - 2 * (block @ query_vector) + query_norm
+            if exclude is not None and start <= exclude < start + len(block):
+                dist[exclude - start] = np.inf
+            rows = np.arange(start, start + len(block))
+            # Nos quedamos con los k mejores del bloque y los fusionamos con los acumulados
+            rows = np.concatenate([best_rows, rows])
+            dist = np.concatenate([best_dist, dist])
+            if len(dist) > k:
+                keep = np.argpartition(dist, k - 1)[:k]
+                rows, dist = rows[keep], dist[keep]
+            best_rows, best_dist = rows, dist
+        finite = np.isfinite(best_dist)
+        best_rows, best_dist = best_rows[finite], best_dist[finite]
+        order = np.argsort(best_dist, kind="stable")
+        return best_rows[order], np.sqrt(np.maximum(best_dist[order], 0))
+
+
+def role_vectors(session, role, method="minmax"):
+    # Métricas normalizadas del rol (NaN -> 0, como en el radar) y sus pesos
+    radar = session.radar(method)
+    roles_metrics_role = session.roles_metrics[role]
+    columns = [radar.column(metric) for metric in roles_metrics_role["Metrics"]]
+    vectors = np.nan_to_num(radar.values[:, columns])
+    return vectors, np.asarray(roles_metrics_role["Weights"], dtype=np.float64)
+
+
+def neighbour_index(session, role, method="minmax"):
+    indexes = _indexes.setdefault(session, {})
+    if (role, method) not in indexes:
+        vectors, weights = role_vectors(session, role, method)
+        indexes[(role, method)] = NeighbourIndex(vectors * np.sqrt(weights))
+    return indexes[(role, method)]
+
+
+# --- Jugadores similares ---
+# Devuelve los k jugadores más cercanos a `player` según la distancia euclídea
+# ponderada por los "Weights" del rol sobre sus métricas normalizadas.
+def similar_players(session, role, player, k=10, method="minmax"):
+    radar = session.radar(method)
+    row = radar.row(player)
+    if row is None:
+        raise KeyError(f"Jugador no encontrado: {player}")
+
+    if len(radar.values) <= BRUTE_FORCE_ROWS:
+        vectors, weights = role_vectors(session, role, method)
+        dist = np.sqrt(((vectors - vectors[row]) ** 2 * weights).sum(axis=1))
+        dist[row] = np.inf
+        k = min(k, len(dist) - 1)
+        rows = np.argpartition(dist, k - 1)[:k] if k > 0 else np.empty(0, dtype=np.intp)
+        rows = rows[np.argsort(dist[rows], kind="stable")]
+        dist = dist[rows]
+    else:
+        index = neighbour_index(session, role, method)
+        rows, dist = index.query(index.vectors[row], k, exclude=row)
+
+    result = session.identity.iloc[rows].reset_index(drop=True)
+    result["Distancia"] = dist
+    return result
@@ -0,0 +1,170 @@
+import contextlib
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from roles import position_groups
+from scoring import dataset_columns
+
+STORE_PATH = os.environ.get("SCOUTING_STORE_PATH", os.path.join("datos_importados", "jugadores.sqlite"))
+
+# Clave de cada fila: un jugador de un equipo, en una temporada y un grupo de posición
+KEY_COLUMNS = ['grupo', 'temporada', 'Player', 'Team']
+IDENTITY_COLUMNS = ['Player', 'Team', 'Position']
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+# --- Base de datos local de jugadores ---
+# Un archivo SQLite con una fila por jugador, equipo, temporada y grupo de posición.
+# Guarda solo las columnas de identidad, de filtro y las métricas que usan los roles;
+# cada una tiene un índice (grupo, temporada, columna) para que query() lea solo las
+# filas filtradas. Reimportar un export actualiza únicamente las filas que cambian
+# y borra las de jugadores que ya no aparecen en él.
+class PlayerStore:
+    # El archivo se crea con la primera importación: abrir la app o leer una base que
+    # todavía no existe no deja un SQLite vacío en disco.
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._ready = False
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _create(self, conn):
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jugadores ("
+            "grupo TEXT NOT NULL, temporada TEXT NOT NULL, \"Player\" TEXT NOT NULL, \"Team\" TEXT NOT NULL, "
+            "\"Position\" TEXT, fila_hash INTEGER NOT NULL, "
+            "PRIMARY KEY (grupo, temporada, \"Player\", \"Team\"))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS revisiones ("
+            "grupo TEXT NOT NULL, temporada TEXT NOT NULL, revision INTEGER NOT NULL, "
+            "PRIMARY KEY (grupo, temporada))"
+        )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # Una conexión por operación: Streamlit ejecuta cada sesión en su propio hilo
+        if not self._ready and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                if not self._ready:
+                    self._create(conn)
+                    self._ready = True
+                yield conn
+        finally:
+            conn.close()
+
+    def _table_columns(self, conn):
+        return [row[1] for row in conn.execute("PRAGMA table_info(jugadores)")]
+
+    def _ensure_columns(self, conn, df, columns):
+        existing = set(self._table_columns(conn))
+        for column in columns:
+            if column in existing:
+                continue
+            sql_type = "REAL" if pd.api.types.is_numeric_dtype(df[column]) else "TEXT"
+            conn.execute(f"ALTER TABLE jugadores ADD COLUMN {_quote(column)} {sql_type}")
+            index_name = _quote("idx_" + column)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON jugadores (grupo, temporada, {_quote(column)})")
+
+    def ingest(self, df, group, season, roles_metrics=None):
+        if roles_metrics is None:
+            roles_metrics = position_groups[group]["Roles"]
+        columns = [col for col in dataset_columns(roles_metrics) if col in df.columns and col not in IDENTITY_COLUMNS]
+        data = df[IDENTITY_COLUMNS + columns].copy()
+        data['Player'] = data['Player'].fillna('').astype(str)
+        data['Team'] = data['Team'].fillna('').astype(str)
+        data = data.drop_duplicates(['Player', 'Team'], keep='last')
+        hashes = pd.util.hash_pandas_object(data, index=False).to_numpy().view(np.int64)
+
+        counts = {"nuevos": 0, "actualizados": 0, "sin cambios": 0, "eliminados": 0}
+        with self._connect() as conn:
+            self._ensure_columns(conn, data, columns)
+            existing = {
+                (player, team): row_hash
+                for player, team, row_hash in conn.execute(
+                    "SELECT \"Player\", \"Team\", fila_hash FROM jugadores WHERE grupo = ? AND temporada = ?",
+                    (group, season))
+            }
+            keys = list(zip(data['Player'], data['Team']))
+            changed = np.array([existing.get(key) != int(row_hash) for key, row_hash in zip(keys, hashes)], dtype=bool)
+            counts["nuevos"] = sum(1 for key in keys if key not in existing)
+            counts["actualizados"] = int(changed.sum()) - counts["nuevos"]
+            counts["sin cambios"] = len(keys) - int(changed.sum())
+
+            rows = data[changed].astype(object).where(data[changed].notna(), None)
+            names = ['grupo', 'temporada'] + list(rows.columns) + ['fila_hash']
+            placeholders = ", ".join("?" for _ in names)
+            updates = ", ".join(f"{_quote(col)} = excluded.{_quote(col)}" for col in names if col not in KEY_COLUMNS)
+            conn.executemany(
+                f"INSERT INTO jugadores ({', '.join(_quote(col) for col in names)}) VALUES ({placeholders}) "
+                f"ON CONFLICT (grupo, temporada, \"Player\", \"Team\") DO UPDATE SET {updates}",
+                [(group, season, *values, int(row_hash))
+                 for values, row_hash in zip(rows.itertuples(index=False, name=None), hashes[changed])]
+            )
+            # El export es la temporada completa: los jugadores que ya no aparecen se borran
+            removed = set(existing) - set(keys)
+            counts["eliminados"] = len(removed)
+            conn.executemany(
+                "DELETE FROM jugadores WHERE grupo = ? AND temporada = ? AND \"Player\" = ? AND \"Team\" = ?",
+                [(group, season, player, team) for player, team in removed]
+            )
+            if changed.any() or removed:
+                conn.execute(
+                    "INSERT INTO revisiones (grupo, temporada, revision) VALUES (?, ?, 1) "
+                    "ON CONFLICT (grupo, temporada) DO UPDATE SET revision = revision + 1",
+                    (group, season))
+        return counts
+
+    def seasons(self, group):
+        if not self.exists():
+            return []
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT temporada FROM jugadores WHERE grupo = ? ORDER BY temporada", (group,))
+            return [row[0] for row in rows]
+
+    def revision(self, group, season):
+        # Cambia cada vez que una importación modifica filas de ese grupo y temporada
+        if not self.exists():
+            return 0
+        with self._connect() as conn:
+            row = conn.execute("SELECT revision FROM revisiones WHERE grupo = ? AND temporada = ?",
+                               (group, season)).fetchone()
+        return row[0] if row else 0
+
+    def query(self, group, season=None, filter_params=None, columns=None):
+        # Devuelve solo las filas que cumplen los filtros y las columnas pedidas
+        if not self.exists():
+            return pd.DataFrame(columns=columns or [])
+        with self._connect() as conn:
+            available = self._table_columns(conn)
+            if columns is None:
+                columns = [col for col in available if col not in ('grupo', 'temporada', 'fila_hash')]
+            columns = [col for col in columns if col in available]
+
+            where, params = ["grupo = ?"], [group]
+            if season is not None:
+                where.append("temporada = ?")
+                params.append(season)
+            for column, value in (filter_params or {}).items():
+                if column not in available:
+                    continue
+                if isinstance(value, tuple):
+                    where.append(f"{_quote(column)} BETWEEN ? AND ?")
+                    params += list(value)
+                else:
+                    where.append(f"{_quote(column)} = ?")
+                    params.append(value)
+
+            sql = (f"SELECT {', '.join(_quote(col) for col in columns)} FROM jugadores "
+                   f"WHERE {' AND '.join(where)} ORDER BY rowid")
+            return pd.read_sql_query(sql, conn, params=params)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from scoring import top_rows
+
+_greens = None
+
+
+# --- Paginación en el servidor ---
+# Filas de la página `page` (empezando en 1) ordenando por values: solo se
+# ordenan las page * page_size primeras (más las empatadas con la última). Como
+# top_rows desempata por fila, las páginas consecutivas se reparten la tabla sin
+# repetir ni saltarse jugadores.
+def page_rows(values, page, page_size, descending=True):
+    return top_rows(values, page * page_size, descending)[(page - 1) * page_size:]
+
+
+# --- Degradado verde precalculado ---
+# Tabla de 256 colores del cmap 'Greens' con su color de texto, calculada una sola
+# vez. Reproduce Styler.background_gradient (mismo índice de color y mismo umbral
+# de luminancia para el texto), pero solo para las celdas de la página visible.
+def greens_lut():
+    global _greens
+    if _greens is None:
+        from matplotlib import colormaps
+
+        rgba = colormaps["Greens"](np.linspace(0, 1, 256))
+        channels = rgba[:, :3]
+        linear = np.where(channels <= 0.04045, channels / 12.92, ((channels + 0.055) / 1.055) ** 2.4)
+        dark = linear @ np.array([0.2126, 0.7152, 0.0722]) < 0.408
+        hex_colors = ["#" + "".join(format(int(v), "02x") for v in row) for row in np.round(channels * 255)]
+        _greens = np.array([f"background-color: {color};color: {'#f1f1f1' if d else '#000000'};"
+                            for color, d in zip(hex_colors, dark)], dtype=object)
+    return _greens
+
+
+def gradient_css(values, vmin, vmax):
+    # values: celdas visibles; vmin/vmax: límites de la columna completa
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    span = vmax - vmin if vmax > vmin else np.inf
+    scaled = (np.where(missing, vmin, values) - vmin) / span
+    index = np.clip(np.floor(scaled * 256), 0, 255).astype(np.intp)
+    css = greens_lut()[index]
+    css[missing] = ""
+    return css
+
+
+def style_page(page, bounds):
+    # bounds: columna -> (mínimo, máximo) sobre la tabla entera
+    css = pd.DataFrame("", index=page.index, columns=page.columns)
+    for column, (vmin, vmax) in bounds.items():
+        css[column] = gradient_css(page[column].to_numpy(dtype=np.float64), vmin, vmax)
+    return page.style.apply(lambda _: css, axis=None)
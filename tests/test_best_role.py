@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from bench import make_export
+from best_role import BestRoleMatrix, pool_columns
+from role_config import compile_plan, default_config, load_plan
+from roles import column_map
+
+
+@pytest.fixture(scope="module")
+def plan():
+    return load_plan()
+
+
+@pytest.fixture(scope="module")
+def export(plan):
+    # Dos "archivos" de la misma distribución: las filas 0-299 y 300-599
+    df = make_export(600, seed=3).rename(columns={v: k for k, v in column_map.items()})
+    return df[[col for col in pool_columns(plan) if col in df.columns]]
+
+
+def test_scores_every_plan_role(plan, export):
+    matrix = BestRoleMatrix({"wingers": export}, plan)
+    assert matrix.roles == [(group, role) for group in plan for role in plan.roles(group)]
+    assert not np.isnan(matrix.scores).any()
+
+
+def test_best_role_does_not_depend_on_source_file(plan, export):
+    first, second = export.iloc[:300], export.iloc[300:]
+    matrix = BestRoleMatrix({"wingers": first, "laterales": second}, plan)
+    swapped = BestRoleMatrix({"laterales": first, "wingers": second}, plan)
+    together = BestRoleMatrix({"mid": export}, plan)
+    np.testing.assert_array_equal(matrix.best, swapped.best)
+    np.testing.assert_array_equal(matrix.best, together.best)
+    np.testing.assert_allclose(matrix.scores, together.scores)
+
+    # Los roles de lateral no favorecen a los jugadores del archivo de laterales
+    r = matrix.roles.index(("laterales", "Defensive FB"))
+    assert abs(matrix.scores[:300, r].mean() - matrix.scores[300:, r].mean()) < 5
+
+
+def test_absent_metric_is_dropped_and_weights_renormalised(plan, export):
+    # Sin "xG per 90" en ningún export, cada rol puntúa como un plan sin esa métrica
+    config = {}
+    for group, group_config in default_config().items():
+        roles = {}
+        for role, spec in group_config["Roles"].items():
+            kept = [(m, w) for m, w in zip(spec["Metrics"], spec["Weights"]) if m != "xG per 90"]
+            roles[role] = {"Metrics": [m for m, _ in kept], "Weights": [w for _, w in kept]}
+        config[group] = {"Roles": roles}
+    without = export.drop(columns="xG per 90")
+    matrix = BestRoleMatrix({"delanteros": without}, plan)
+    expected = BestRoleMatrix({"delanteros": without}, compile_plan(config))
+    np.testing.assert_allclose(matrix.scores, expected.scores)
+
@@ -0,0 +1,128 @@
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datasets
+from bench import make_export
+from datasets import DatasetCache, MetricStats, import_dataset, load_stats, read_export
+from roles import column_map, position_groups
+from scoring import dataset_columns
+
+
+@pytest.fixture(scope="module")
+def export():
+    df = make_export(230, seed=19, missing=0.1)
+    df.loc[:4, column_map['Edad']] = np.nan
+    return df
+
+
+def uploaded(df, name):
+    # Como un archivo subido en Streamlit: nombre y getvalue()
+    buffer = io.BytesIO()
+    if name.endswith(".csv"):
+        buffer.write(df.to_csv(index=False).encode())
+    else:
+        df.to_excel(buffer, index=False)
+    upload = io.BytesIO(buffer.getvalue())
+    upload.name = name
+    return upload
+
+
+@pytest.mark.parametrize("name", ["liga_mid.csv", "liga_mid.xlsx"])
+def test_chunked_read_matches_whole_file(export, name):
+    columns = dataset_columns(position_groups["mid"]["Roles"])
+    df, stats = read_export(uploaded(export, name), columns, chunk_size=50)
+    expected = export.rename(columns={v: k for k, v in column_map.items()})
+    assert list(df.columns) == [col for col in columns if col in expected.columns]
+    assert df["Player"].tolist() == expected["Player"].tolist()
+    for column in df.columns[3:]:
+        assert df[column].dtype == np.float32
+        np.testing.assert_allclose(df[column], expected[column].astype(np.float32), equal_nan=True)
+        values = expected[column].dropna()
+        assert stats.count[column] == len(values)
+        assert stats.min[column] == pytest.approx(values.min(), rel=1e-6)
+        assert stats.max[column] == pytest.approx(values.max(), rel=1e-6)
+
+
+def test_metric_stats_round_trip():
+    stats = MetricStats()
+    stats.update(pd.DataFrame({"Player": ["a", "b"], "xA": np.array([0.5, np.nan], dtype=np.float32)}))
+    stats.update(pd.DataFrame({"Player": ["c"], "xA": np.array([0.25], dtype=np.float32)}))
+    stats.update(pd.DataFrame({"Player": ["d"], "xA": np.array([np.nan], dtype=np.float32)}))
+    assert stats.bounds() == {"xA": (0.25, 0.5)} and stats.count == {"xA": 2}
+    restored = MetricStats.from_dict(json.loads(json.dumps(stats.to_dict())))
+    assert restored.bounds() == stats.bounds() and restored.count == stats.count
+
+
+def test_import_writes_parquet_and_stats(export, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(datasets, "DATA_DIR", str(tmp_path))
+    upload = uploaded(export, "liga_cbs.csv")
+    key = datasets.file_hash(upload)
+    path = import_dataset(upload, key)
+    df = pd.read_parquet(path)
+    assert len(df) == len(export)
+    assert set(datasets.all_role_columns()) <= set(df.columns)
+    stats = load_stats(key)
+    assert stats.bounds()["xA"] == (float(df["xA"].min()), float(df["xA"].max()))
+    # Una segunda importación reutiliza el Parquet
+    mtime = (tmp_path / f"{key}.parquet").stat().st_mtime_ns
+    assert import_dataset(upload, key) == path
+    assert (tmp_path / f"{key}.parquet").stat().st_mtime_ns == mtime
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+class Sized:
+    def __init__(self, size):
+        self.size = size
+
+    def memory_usage(self):
+        return self.size
+
+
+def test_cache_evicts_least_recently_used():
+    cache = DatasetCache(max_entries=3)
+    for key in "abc":
+        cache.put(key, Sized(1))
+    assert cache.get("a") is not None
+    cache.put("d", Sized(1))
+    assert cache.get("b") is None
+    assert [key for key in "acd" if cache.get(key) is not None] == list("acd")
+    stats = cache.stats()
+    assert stats["entradas"] == 3 and stats["fallos"] == 1
+
+
+def test_cache_evicts_by_bytes_and_remeasures_on_get():
+    cache = DatasetCache(max_entries=10, max_bytes=100)
+    cache.put("a", Sized(40))
+    grown = Sized(40)
+    cache.put("b", grown)
+    assert cache.nbytes() == 80
+    # Una entrada que creció se vuelve a medir al leerla y expulsa a la más antigua
+    grown.size = 90
+    assert cache.get("b") is grown
+    assert cache.get("a") is None and cache.nbytes() == 90
+    # La entrada más reciente se queda aunque pase del límite por sí sola
+    cache.put("c", Sized(500))
+    assert len(cache) == 1 and cache.get("c") is not None
+
+
+def test_disk_frames_are_pruned_by_last_use(tmp_path):
+    pytest.importorskip("pyarrow")
+    cache = DatasetCache(directory=str(tmp_path), max_disk_bytes=None)
+    frame = pd.DataFrame({"Puntaje_A": np.arange(2000, dtype=np.float64)})
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.save_frame(key, frame)
+        os.utime(cache._frame_path(key), (1000 + i, 1000 + i))
+    size = os.path.getsize(cache._frame_path("a"))
+    # Leer "a" la marca como usada; al guardar "d" por encima del tope se borran "b" y "c"
+    pd.testing.assert_frame_equal(cache.load_frame("a"), frame)
+    cache.max_disk_bytes = 2 * size + size // 2
+    cache.save_frame("d", frame)
+    assert [key for key in "abcd" if os.path.exists(cache._frame_path(key))] == ["a", "d"]
+    assert cache.load_frame("b") is None
+    assert cache.stats()["aciertos en disco"] == 1
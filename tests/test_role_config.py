@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from role_config import PlanLoader, RoleConfigError, compile_plan, default_config, load_plan
+from roles import position_groups
+
+
+def config(roles):
+    return {"mid": {"Roles": roles}}
+
+
+@pytest.mark.parametrize("roles, message", [
+    ({"A": {"Metrics": ["xA"]}}, "'Metrics' y 'Weights'"),
+    ({"A": {"Metrics": [], "Weights": []}}, "lista no vacía"),
+    ({"A": {"Metrics": ["xA", "xA"], "Weights": [1, 1]}}, "repetidas"),
+    ({"A": {"Metrics": ["xA", "xG per 90"], "Weights": [1]}}, "2 métricas y 1 pesos"),
+    ({"A": {"Metrics": ["xA"], "Weights": [-1]}}, "no negativos"),
+    ({"A": {"Metrics": ["xA"], "Weights": [True]}}, "no negativos"),
+    ({"A": {"Metrics": ["xA"], "Weights": [0]}}, "suma de los pesos"),
+    ({}, "falta el diccionario 'Roles'"),
+])
+def test_invalid_roles_are_rejected(roles, message):
+    with pytest.raises(RoleConfigError, match=message):
+        compile_plan(config(roles))
+
+
+def test_unknown_group_and_descriptions():
+    with pytest.raises(RoleConfigError, match="Grupo desconocido"):
+        compile_plan({"porteros": {"Roles": {"A": {"Metrics": ["xA"], "Weights": [1]}}}})
+    roles = {"A": {"Metrics": ["xA"], "Weights": [1]}}
+    with pytest.raises(RoleConfigError, match="rol que no existe"):
+        compile_plan({"mid": {"Roles": roles, "Descripciones": {"B": {}}}})
+
+
+def test_weights_are_normalised_and_compiled():
+    plan = compile_plan(config({"A": {"Metrics": ["xA", "xG per 90"], "Weights": [3, 1]},
+                                "B": {"Metrics": ["xG per 90"], "Weights": [2]}}))
+    assert plan.roles("mid")["A"]["Weights"] == [0.75, 0.25]
+    role_weights = plan.role_weights("mid")
+    assert role_weights.metrics == ["xA", "xG per 90"] and role_weights.roles == ["A", "B"]
+    # Cada fila apunta a sus métricas; el hueco, a la columna de relleno
+    np.testing.assert_array_equal(role_weights.metric_index, [[0, 1], [1, 2]])
+    np.testing.assert_allclose(role_weights.weights, [[0.75, 0.25], [1.0, 0.0]])
+
+
+def test_file_overrides_only_its_groups(tmp_path):
+    path = tmp_path / "roles.json"
+    path.write_text(json.dumps(config({"A": {"Metrics": ["xA"], "Weights": [1]}})))
+    plan = load_plan(str(path))
+    assert list(plan.roles("mid")) == ["A"]
+    assert plan.roles("cbs") == compile_plan(default_config()).roles("cbs")
+    assert plan.hash != load_plan().hash
+    assert set(plan) == set(position_groups)
+
+
+def test_loader_keeps_last_valid_plan(tmp_path):
+    path = tmp_path / "roles.json"
+    path.write_text(json.dumps(config({"A": {"Metrics": ["xA"], "Weights": [1]}})))
+    loader = PlanLoader(str(path))
+    assert list(loader.get().roles("mid")) == ["A"] and loader.error is None
+
+    path.write_text("{no es json")
+    os.utime(path, ns=(1, 1))
+    assert list(loader.get().roles("mid")) == ["A"]
+    assert loader.error is not None
+
+    path.write_text(json.dumps(config({"B": {"Metrics": ["xA"], "Weights": [1]}})))
+    os.utime(path, ns=(2, 2))
+    assert list(loader.get().roles("mid")) == ["B"] and loader.error is None
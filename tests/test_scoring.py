@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from roles import column_map, position_groups
+from scoring import (FilterIndex, ScoringSession, apply_shrinkage, calculate_score_all_roles_wide,
+                     compile_role_weights, dataset_columns, filter_players, normalize_series, shrink_values, top_rows)
+
+# Contrato de ScoringSession: guarda las métricas en float32, así que sobre la escala
+# 0-100 puede separarse de la referencia en float64 por redondeo (~1e-5). Con datos
+# de 2 decimales, como los exports, el redondeo no crea ni deshace empates.
+FLOAT32_ATOL = 1e-4
+METHODS = ["minmax", "percentile", "robust"]
+
+
+# --- Referencia: el bucle métrica a métrica original ---
+def reference_normalize(series, method):
+    if method == "percentile":
+        if series.count() == 1:
+            return series * 0 + 50
+        return (series.rank(method="average") - 1) / (series.count() - 1) * 100
+    if method == "robust":
+        median = series.median()
+        mad = (series - median).abs().median() * 1.4826
+        if not mad > 0:
+            mad = (series - median).abs().mean() * 1.2533
+        if not mad > 0:
+            return series * 0 + 50
+        return (50 + (series - median) / mad * (50 / 3.0)).clip(0, 100)
+    min_val, max_val = series.min(), series.max()
+    if max_val > min_val:
+        return (series - min_val) / (max_val - min_val) * 100
+    return series * 0 + 50
+
+
+def reference_scores(df, roles_metrics, filter_params, method="minmax", shrinkage=None):
+    # La contracción usa la media de todo el dataset; después se filtra y se normaliza
+    if shrinkage is not None:
+        metrics = [col for col in dataset_columns(roles_metrics)[3 + len(column_map):] if col in df.columns]
+        df = df.copy()
+        df[metrics] = apply_shrinkage(df[metrics].to_numpy(dtype=np.float64), df['Minutos jugados'].to_numpy(),
+                                      shrinkage)
+    df = filter_players(df, filter_params)
+    df_final = df[['Player', 'Team', 'Position']].drop_duplicates().reset_index(drop=True)
+    for role in roles_metrics.keys():
+        puntaje = pd.Series(0.0, index=df.index)
+        for metric, weight in zip(roles_metrics[role]["Metrics"], roles_metrics[role]["Weights"]):
+            if metric in df.columns:
+                puntaje += reference_normalize(df[metric].astype(np.float64), method) * weight
+        df_final["Puntaje_" + role.strip()] = reference_normalize(puntaje, "minmax").values
+    return df_final
+
+
+def make_export(roles_metrics, n_rows, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Player': [f"Jugador {i}" for i in range(n_rows)],
+        'Team': rng.choice(["A", "B", "C", "D"], n_rows),
+        'Position': rng.choice(["CMF", "DMF", "AMF"], n_rows),
+        'Minutos jugados': rng.integers(0, 3000, n_rows).astype(np.float64),
+        'Altura': rng.integers(165, 200, n_rows).astype(np.float64),
+        'Edad': rng.integers(17, 38, n_rows).astype(np.float64),
+    })
+    metrics = dataset_columns(roles_metrics)[3 + len(column_map):]
+    for metric in metrics:
+        df[metric] = np.round(rng.gamma(2.0, 1.5, n_rows), 2)
+    # Huecos, una métrica constante y otra que el export no trae
+    for metric in metrics[:3]:
+        df.loc[rng.random(n_rows) < 0.1, metric] = np.nan
+    df[metrics[3]] = 1.5
+    # Mayoría de ceros: MAD 0 en el z-score robusto
+    df.loc[rng.random(n_rows) < 0.6, metrics[5]] = 0.0
+    return df.drop(columns=metrics[4])
+
+
+def random_filters(n_filters, seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(n_filters):
+        min_minutes = int(rng.integers(0, 2000))
+        min_age = int(rng.integers(17, 25))
+        filters = {'Minutos jugados': (min_minutes, np.inf), 'Edad': (min_age, int(rng.integers(min_age, 38)))}
+        if rng.random() < 0.5:
+            filters['Altura'] = (int(rng.integers(165, 185)), 200)
+        yield filters
+
+
+def assert_same_scores(result, expected, atol):
+    assert list(result.columns) == list(expected.columns)
+    for column in ['Player', 'Team', 'Position']:
+        assert result[column].astype(str).tolist() == expected[column].astype(str).tolist()
+    score_columns = [col for col in expected.columns if col.startswith("Puntaje_")]
+    np.testing.assert_allclose(result[score_columns].to_numpy(dtype=np.float64),
+                               expected[score_columns].to_numpy(dtype=np.float64), atol=atol, equal_nan=True)
+
+
+@pytest.mark.parametrize("group", sorted(position_groups))
+@pytest.mark.parametrize("method", METHODS)
+def test_wide_matches_reference(group, method):
+    roles_metrics = position_groups[group]["Roles"]
+    df = make_export(roles_metrics, 300, seed=1)
+    for filters in random_filters(5, seed=2):
+        expected = reference_scores(df, roles_metrics, filters, method)
+        result = calculate_score_all_roles_wide(filter_players(df, filters), roles_metrics, method)
+        assert_same_scores(result, expected, atol=1e-9)
+
+
+@pytest.mark.parametrize("group", sorted(position_groups))
+@pytest.mark.parametrize("method", METHODS)
+def test_session_matches_reference_over_slider_sequence(group, method):
+    roles_metrics = position_groups[group]["Roles"]
+    df = make_export(roles_metrics, 300, seed=3)
+    session = ScoringSession(df, roles_metrics)
+    # Misma sesión para toda la secuencia: los límites incrementales se arrastran entre ajustes
+    filters = list(random_filters(12, seed=4))
+    for filter_params in filters + filters[:3]:
+        expected = reference_scores(df, roles_metrics, filter_params, method)
+        assert_same_scores(session.score(filter_params, method), expected, FLOAT32_ATOL)
+
+
+@pytest.mark.parametrize("shrinkage", ["auto", 900])
+@pytest.mark.parametrize("method", METHODS)
+def test_session_shrinkage_matches_reference(method, shrinkage):
+    roles_metrics = position_groups["mid"]["Roles"]
+    df = make_export(roles_metrics, 300, seed=5)
+    session = ScoringSession(df, roles_metrics)
+    for filter_params in random_filters(5, seed=6):
+        expected = reference_scores(df, roles_metrics, filter_params, method, shrinkage)
+        assert_same_scores(session.score(filter_params, method, shrinkage), expected, FLOAT32_ATOL)
+
+
+def test_session_with_plan_weights_and_base_bounds():
+    roles_metrics = position_groups["delanteros"]["Roles"]
+    df = make_export(roles_metrics, 200, seed=7)
+    # Pesos compilados para el export completo y aplicados a uno al que le falta una métrica
+    role_weights = compile_role_weights(roles_metrics, dataset_columns(roles_metrics))
+    metrics = [col for col in df.columns if col in role_weights.metrics]
+    bounds = {metric: (df[metric].min(), df[metric].max()) for metric in metrics}
+    session = ScoringSession(df, roles_metrics, base_bounds=bounds, role_weights=role_weights)
+    for filter_params in [{}] + list(random_filters(4, seed=8)) + [{}]:
+        expected = reference_scores(df, roles_metrics, filter_params)
+        assert_same_scores(session.score(filter_params), expected, FLOAT32_ATOL)
+
+
+def test_empty_subset():
+    roles_metrics = position_groups["cbs"]["Roles"]
+    df = make_export(roles_metrics, 50, seed=9)
+    session = ScoringSession(df, roles_metrics)
+    result = session.score({'Minutos jugados': (5000, np.inf)})
+    assert len(result) == 0
+    assert list(result.columns) == list(reference_scores(df, roles_metrics, {}).columns)
+
+
+def test_shrink_values_limits():
+    rng = np.random.default_rng(10)
+    values = rng.normal(1.0, 0.5, (40, 3))
+    values[::7, 1] = np.nan
+    minutes = rng.integers(0, 2000, 40).astype(np.float64)
+    # k = 0 no contrae; k infinito lleva todo a la media ponderada por minutos
+    np.testing.assert_allclose(shrink_values(values, minutes, 0.0), values, equal_nan=True)
+    shrunk = shrink_values(values, minutes, np.inf)
+    present = ~np.isnan(values[:, 1])
+    prior = np.average(values[present, 1], weights=minutes[present])
+    np.testing.assert_allclose(shrunk[present, 1], prior)
+    assert np.isnan(shrunk[~present, 1]).all()
+    # Un k intermedio queda entre el valor propio y la media
+    w = minutes / (minutes + 900.0)
+    prior = np.average(values[:, 0], weights=minutes)
+    np.testing.assert_allclose(shrink_values(values, minutes, 900.0)[:, 0], w * values[:, 0] + (1 - w) * prior)
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_top_rows_matches_stable_argsort(descending):
+    rng = np.random.default_rng(11)
+    for _ in range(200):
+        n_rows = int(rng.integers(1, 80))
+        # Pocos valores distintos y muchos NaN: empates en el corte
+        values = rng.integers(0, 5, n_rows).astype(np.float64)
+        values[rng.random(n_rows) < 0.3] = np.nan
+        key = np.where(np.isnan(values), np.inf, -values if descending else values)
+        expected = np.argsort(key, kind="stable")
+        for n in [0, 1, int(rng.integers(1, n_rows + 1)), n_rows, n_rows + 5]:
+            np.testing.assert_array_equal(top_rows(values, n, descending), expected[:n])
+
+
+def test_session_metric_filters_keep_boundary_values():
+    # Las métricas se guardan en float32: 0.7 y 0.8 no son exactos y el filtro debe compararlos igual que pandas
+    roles_metrics = position_groups["mid"]["Roles"]
+    df = make_export(roles_metrics, 100, seed=13)
+    df.loc[3, "xG per 90"] = 0.7
+    df.loc[4, "xG per 90"] = 0.8
+    session = ScoringSession(df, roles_metrics)
+    for filter_params in [{"xG per 90": (0.7, np.inf)}, {"xG per 90": (0.0, 0.7)}, {"xG per 90": 0.8},
+                          {"xG per 90": (0.7, 0.8)}, {"Minutos jugados": (500, 2000), "xG per 90": (0.7, np.inf)}]:
+        expected = filter_players(df, filter_params)
+        assert len(expected) > 0
+        assert session.score(filter_params)["Player"].astype(str).tolist() == expected["Player"].tolist()
+
+
+def test_robust_keeps_zero_heavy_metrics():
+    # Más de la mitad de ceros: el MAD es 0, pero la métrica sigue separando a los jugadores
+    series = pd.Series([0.0] * 6 + [0.2, 0.5, 1.1, 2.0])
+    result = normalize_series(series, "robust")
+    assert (result[:6] == 50).all()
+    assert result.is_monotonic_increasing and result.iloc[-1] > result.iloc[6] > 50
+    assert (normalize_series(pd.Series([1.5] * 5), "robust") == 50).all()
+
+
+def test_cli_shrinkage_matches_session(tmp_path):
+    # El CLI contrae hacia la media de todo el export y después filtra, igual que la app
+    from cli import score_file
+
+    roles_metrics = position_groups["mid"]["Roles"]
+    df = make_export(roles_metrics, 300, seed=14)
+    path = tmp_path / "liga_mid.csv"
+    df.rename(columns=column_map).to_csv(path, index=False)
+    filter_params = {'Minutos jugados': (1500, 3500)}
+    df_score = score_file(str(path), "mid", filter_params, shrinkage=900)[0]
+    expected = reference_scores(df, roles_metrics, filter_params, shrinkage=900)
+    assert_same_scores(df_score.drop(columns="Archivo"), expected, FLOAT32_ATOL)
+
+
+def test_filter_index_matches_filter_players():
+    roles_metrics = position_groups["wingers"]["Roles"]
+    df = make_export(roles_metrics, 200, seed=15)
+    df.loc[:9, 'Edad'] = np.nan
+    index = FilterIndex(df)
+    cases = [{}, {'Edad': (20, 25)}, {'Edad': 22}, {'Edad': (40, 50)}, {'Altura': (180, 190), 'Edad': (18, 30)},
+             {'Minutos jugados': (0, np.inf), 'Edad': (17, 38)}, {'Team': "B"}, {'Columna que no existe': (0, 1)},
+             {'Successful dribbles, %': (3.0, np.inf)}]
+    for filter_params in cases:
+        expected = filter_players(df, filter_params)
+        np.testing.assert_array_equal(index.lookup(filter_params), np.flatnonzero(df.index.isin(expected.index)))
+        pd.testing.assert_frame_equal(filter_players(df, filter_params, index), expected)
+    # Los NaN nunca cumplen un filtro
+    assert not index.mask({'Edad': (0, np.inf)})[:10].any()
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import similarity
+from bench import make_export
+from roles import column_map, position_groups
+from scoring import ScoringSession
+from similarity import NeighbourIndex, role_vectors, similar_players
+
+
+@pytest.fixture(scope="module")
+def session():
+    df = make_export(500, seed=16).rename(columns={v: k for k, v in column_map.items()})
+    return ScoringSession(df, position_groups["mid"]["Roles"])
+
+
+def brute_force(session, role, player, method="minmax"):
+    vectors, weights = role_vectors(session, role, method)
+    row = session.radar(method).row(player)
+    dist = np.sqrt(((vectors.astype(np.float64) - vectors[row]) ** 2 * weights).sum(axis=1))
+    dist[row] = np.inf
+    order = np.argsort(dist, kind="stable")
+    return order[:-1], dist[order[:-1]]
+
+
+@pytest.mark.parametrize("method", ["minmax", "percentile"])
+def test_nearest_players_by_weighted_distance(session, method):
+    role = "Creator"
+    rows, dist = brute_force(session, role, "Jugador 7", method)
+    result = similar_players(session, role, "Jugador 7", 10, method)
+    assert "Jugador 7" not in result["Player"].astype(str).tolist()
+    np.testing.assert_allclose(result["Distancia"], dist[:10], rtol=1e-5)
+    assert result["Player"].astype(str).tolist() == session.identity["Player"].iloc[rows[:10]].astype(str).tolist()
+    # Pedir más vecinos que jugadores devuelve a todos los demás
+    assert len(similar_players(session, role, "Jugador 7", 10000, method)) == len(rows)
+
+
+def test_block_index_matches_brute_force(session, monkeypatch):
+    role = "Box Crashers"
+    expected = similar_players(session, role, "Jugador 3", 15)
+    # Por encima de BRUTE_FORCE_ROWS se consulta el índice por bloques
+    monkeypatch.setattr(similarity, "BRUTE_FORCE_ROWS", 0)
+    result = similar_players(session, role, "Jugador 3", 15)
+    assert result["Player"].tolist() == expected["Player"].tolist()
+    np.testing.assert_allclose(result["Distancia"], expected["Distancia"], rtol=1e-4)
+
+
+def test_neighbour_index_merges_blocks():
+    rng = np.random.default_rng(17)
+    vectors = rng.normal(size=(300, 4))
+    index = NeighbourIndex(vectors, block_size=32)
+    rows, dist = index.query(vectors[5], k=20, exclude=5)
+    expected = np.linalg.norm(vectors - vectors[5], axis=1)
+    expected[5] = np.inf
+    np.testing.assert_array_equal(rows, np.argsort(expected, kind="stable")[:20])
+    np.testing.assert_allclose(dist, np.sort(expected)[:20], rtol=1e-3)
+
+
+def test_unknown_player(session):
+    with pytest.raises(KeyError):
+        similar_players(session, "Creator", "No existe")
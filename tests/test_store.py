@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from bench import make_export
+from roles import column_map
+from store import PlayerStore
+
+
+@pytest.fixture
+def export():
+    return make_export(100, seed=18).rename(columns={v: k for k, v in column_map.items()})
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PlayerStore(str(tmp_path / "base" / "jugadores.sqlite"))
+
+
+def test_store_file_is_created_on_first_import(store, export):
+    assert store.seasons("mid") == [] and store.revision("mid", "2024-25") == 0
+    assert store.query("mid", columns=["Player"]).empty
+    assert not store.exists()
+    store.ingest(export, "mid", "2024-25")
+    assert store.exists()
+    assert store.seasons("mid") == ["2024-25"] and store.seasons("cbs") == []
+
+
+def test_reimport_upserts_deletes_and_bumps_revision(store, export):
+    counts = store.ingest(export, "mid", "2024-25")
+    assert counts == {"nuevos": 100, "actualizados": 0, "sin cambios": 0, "eliminados": 0}
+    assert store.revision("mid", "2024-25") == 1
+
+    # Sin cambios: la revisión se mantiene
+    assert store.ingest(export, "mid", "2024-25")["sin cambios"] == 100
+    assert store.revision("mid", "2024-25") == 1
+
+    updated = export.iloc[:90].copy()
+    updated.loc[0, "xG per 90"] = 9.99
+    counts = store.ingest(updated, "mid", "2024-25")
+    assert counts == {"nuevos": 0, "actualizados": 1, "sin cambios": 89, "eliminados": 10}
+    assert store.revision("mid", "2024-25") == 2
+    stored = store.query("mid", "2024-25")
+    assert stored["Player"].tolist() == updated["Player"].tolist()
+    assert stored.loc[0, "xG per 90"] == pytest.approx(9.99)
+    # Otras temporadas no se tocan
+    store.ingest(export, "mid", "2023-24")
+    assert len(store.query("mid", "2023-24")) == 100 and store.revision("mid", "2024-25") == 2
+
+
+def test_query_filters_and_columns(store, export):
+    store.ingest(export, "mid", "2024-25")
+    store.ingest(export.iloc[:10], "cbs", "2024-25")
+    filters = {'Edad': (20, 25), 'Minutos jugados': (900, np.inf)}
+    df = store.query("mid", "2024-25", filters, columns=["Player", "Edad", "Minutos jugados", "No existe"])
+    assert list(df.columns) == ["Player", "Edad", "Minutos jugados"]
+    expected = export[export['Edad'].between(20, 25) & (export['Minutos jugados'] >= 900)]
+    assert df["Player"].tolist() == expected["Player"].tolist()
+    assert len(store.query("cbs")) == 10
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from tables import gradient_css, page_rows, style_page
+
+
+def test_pages_partition_the_table():
+    rng = np.random.default_rng(12)
+    # Puntajes con muchos empates y un 30% de NaN, como un export al que le falta una métrica
+    values = np.round(rng.uniform(0, 100, 300), 0)
+    values[rng.random(300) < 0.3] = np.nan
+    for page_size in [7, 50, 300]:
+        n_pages = -(-len(values) // page_size)
+        pages = [page_rows(values, page, page_size) for page in range(1, n_pages + 1)]
+        assert all(len(rows) <= page_size for rows in pages)
+        rows = np.concatenate(pages)
+        np.testing.assert_array_equal(np.sort(rows), np.arange(len(values)))
+        key = np.where(np.isnan(values), np.inf, -values)
+        np.testing.assert_array_equal(rows, np.argsort(key, kind="stable"))
+
+
+def test_style_page_matches_background_gradient():
+    df = pd.DataFrame({"Puntaje_A": [0.0, 12.5, 50.0, 99.0, 100.0, np.nan]})
+    expected = df.style.background_gradient(cmap="Greens", subset=["Puntaje_A"])._compute().ctx
+    page = df.iloc[1:4]
+    styled = style_page(page, {"Puntaje_A": (0.0, 100.0)})._compute().ctx
+    for (row, col), css in styled.items():
+        assert css == expected[(row + 1, col)]
+    assert list(gradient_css([np.nan], 0.0, 100.0)) == [""]
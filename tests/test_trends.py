@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench import make_export
+from datasets import DatasetCache
+from roles import column_map, position_groups
+from store import PlayerStore
+from trends import TrendHistory
+
+ROLES = {"A": {"Metrics": ["xA"], "Weights": [1.0]}, "B": {"Metrics": ["xG per 90"], "Weights": [1.0]}}
+
+
+def snapshot(players, teams, a, b):
+    return pd.DataFrame({"Player": players, "Team": teams, "Position": "CMF", "Puntaje_A": a, "Puntaje_B": b})
+
+
+def test_trends_follow_players_across_teams():
+    history = TrendHistory(ROLES)
+    history.append("2022-23", snapshot(["x", "y"], ["T1", "T2"], [10.0, 50.0], [0.0, 0.0]))
+    history.append("2024-25", snapshot(["x", "z"], ["T3", "T2"], [30.0, 70.0], [0.0, 0.0]))
+    # Una temporada intermedia añadida después se ordena por etiqueta
+    history.append("2023-24", snapshot(["x", "y"], ["T1", "T2"], [20.0, 40.0], [0.0, 0.0]))
+    assert history.snapshots() == ["2022-23", "2023-24", "2024-25"]
+
+    table = history.trends("A", window=3, min_snapshots=2).set_index("Player")
+    assert list(table.index) == ["x", "y"]
+    # x cambió de equipo: se sigue por nombre y se muestra el de la última temporada
+    assert table.loc["x", "Team"] == "T3"
+    assert table.loc["x", "Delta"] == pytest.approx(10.0)
+    assert table.loc["x", "Media móvil"] == pytest.approx(20.0)
+    assert table.loc["x", "Tendencia"] == pytest.approx(10.0)
+    # y no juega la última: su tendencia sale de las temporadas en las que aparece
+    assert np.isnan(table.loc["y", "Delta"])
+    assert table.loc["y", "Tendencia"] == pytest.approx(-10.0)
+
+    history.remove("2024-25")
+    assert history.snapshots() == ["2022-23", "2023-24"]
+    long = history.player_history(["x", "no existe"], "A", window=2)
+    assert long["Puntaje"].tolist() == [10.0, 20.0] and long["Media móvil"].tolist() == [10.0, 15.0]
+
+
+def test_sync_store_scores_only_new_or_reimported_seasons(tmp_path):
+    roles_metrics = position_groups["mid"]["Roles"]
+    store = PlayerStore(str(tmp_path / "jugadores.sqlite"))
+    exports = {season: make_export(80, seed=i).rename(columns={v: k for k, v in column_map.items()})
+               for i, season in enumerate(["2022-23", "2023-24"])}
+    for season, df in exports.items():
+        store.ingest(df, "mid", season)
+    cache = DatasetCache()
+    history = TrendHistory(roles_metrics, "minmax", {'Minutos jugados': (500, np.inf)})
+    assert history.sync_store(store, "mid", cache) == ["2022-23", "2023-24"]
+    assert history.sync_store(store, "mid", cache) == []
+
+    store.ingest(exports["2023-24"].iloc[:60], "mid", "2023-24")
+    assert history.sync_store(store, "mid", cache) == ["2023-24"]
+    labels, values = history.matrix(next(iter(roles_metrics)).strip())
+    assert labels == ["2022-23", "2023-24"] and values.dtype == np.float32
+    # Los jugadores borrados en la reimportación no tienen puntaje en esa temporada
+    assert np.isnan(values[history.players.index("Jugador 70"), 1])
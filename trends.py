@@ -0,0 +1,138 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from datasets import load_store_session
+
+
+# --- Evolución de puntajes por temporada ---
+# Cada instantánea (una temporada o media temporada de la base local, p. ej.
+# "2024-25" o "2025-I") se puntúa por separado, así que su Puntaje_* compara al
+# jugador con el resto de jugadores de esa misma instantánea. De cada una solo se
+# guardan los ids de jugador (int32) y la matriz jugadores x roles en float32:
+# añadir una instantánea puntúa únicamente esa y el resto no se vuelve a tocar.
+# Los jugadores se siguen por nombre para no perderlos al cambiar de equipo.
+class TrendHistory:
+    def __init__(self, roles_metrics, method="minmax", filter_params=None, shrinkage=None):
+        self.roles = [role.strip() for role in roles_metrics]
+        self.method = method
+        self.shrinkage = shrinkage
+        self.filter_params = filter_params or {}
+        self.players = []
+        self.teams = []
+        self._ids = {}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def snapshots(self):
+        return sorted(self._snapshots)
+
+    def revision(self, label):
+        return self._snapshots[label][2] if label in self._snapshots else None
+
+    def append(self, label, df_score, revision=None):
+        # df_score: tabla de ScoringSession.score (Player, Team, ..., Puntaje_*)
+        df_score = df_score.drop_duplicates('Player')
+        names = df_score['Player'].astype(str).tolist()
+        teams = df_score['Team'].astype(str).tolist()
+        scores = df_score[["Puntaje_" + role for role in self.roles]].to_numpy(dtype=np.float32)
+        with self._lock:
+            latest = not self._snapshots or label >= max(self._snapshots)
+            ids = np.empty(len(names), dtype=np.int32)
+            for i, (name, team) in enumerate(zip(names, teams)):
+                player_id = self._ids.get(name)
+                if player_id is None:
+                    player_id = self._ids[name] = len(self.players)
+                    self.players.append(name)
+                    self.teams.append(team)
+                elif latest:
+                    self.teams[player_id] = team
+                ids[i] = player_id
+            self._snapshots[label] = (ids, scores, revision)
+
+    def append_session(self, label, session, revision=None):
+        self.append(label, session.score(self.filter_params, self.method, self.shrinkage), revision)
+
+    def remove(self, label):
+        with self._lock:
+            self._snapshots.pop(label, None)
+
+    def sync_store(self, store, group, cache, roles_metrics=None, role_weights=None):
+        # Puntúa solo las temporadas nuevas o reimportadas desde la última llamada
+        added = []
+        for season in store.seasons(group):
+            revision = store.revision(group, season)
+            if self.revision(season) == revision:
+                continue
+            session = load_store_session(store, group, season, cache, roles_metrics, role_weights)
+            if session is None:
+                self.remove(season)
+                continue
+            self.append_session(season, session, revision)
+            added.append(season)
+        return added
+
+    def matrix(self, role):
+        # Jugadores x instantáneas (orden de las etiquetas), NaN si el jugador no aparece
+        r = self.roles.index(role)
+        with self._lock:
+            labels = self.snapshots()
+            values = np.full((len(self.players), len(labels)), np.nan, dtype=np.float32)
+            for j, label in enumerate(labels):
+                ids, scores, _ = self._snapshots[label]
+                values[ids, j] = scores[:, r]
+        return labels, values
+
+    def trends(self, role, window=3, min_snapshots=1):
+        # Puntaje por instantánea, cambio respecto a la anterior, media móvil y
+        # pendiente (puntos por instantánea) de las últimas `window`
+        labels, values = self.matrix(role)
+        values = values.astype(np.float64)
+        present = ~np.isnan(values)
+        keep = present.sum(axis=1) >= min_snapshots
+        values, present = values[keep], present[keep]
+
+        result = pd.DataFrame({'Player': np.asarray(self.players, dtype=object)[keep],
+                               'Team': np.asarray(self.teams, dtype=object)[keep]})
+        for j, label in enumerate(labels):
+            result[label] = values[:, j]
+        if len(labels) >= 2:
+            result["Delta"] = values[:, -1] - values[:, -2]
+        else:
+            result["Delta"] = np.nan
+
+        recent = values[:, -window:]
+        valid = present[:, -window:]
+        n = valid.sum(axis=1)
+        x = np.broadcast_to(np.arange(recent.shape[1], dtype=np.float64), recent.shape)
+        y = np.where(valid, recent, 0.0)
+        sum_x = np.where(valid, x, 0.0).sum(axis=1)
+        sum_y = y.sum(axis=1)
+        sum_xx = np.where(valid, x * x, 0.0).sum(axis=1)
+        sum_xy = (np.where(valid, x, 0.0) * y).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result["Media móvil"] = np.where(n > 0, sum_y / n, np.nan)
+            denominator = n * sum_xx - sum_x ** 2
+            result["Tendencia"] = np.where((n >= 2) & (denominator > 0),
+                                           (n * sum_xy - sum_x * sum_y) / denominator, np.nan)
+        return result
+
+    def player_history(self, players, role, window=3):
+        # Formato largo para el gráfico: una fila por jugador e instantánea
+        labels, values = self.matrix(role)
+        rows = [self._ids[player] for player in players if player in self._ids]
+        frame = pd.DataFrame(values[rows].T.astype(np.float64), index=labels,
+                             columns=[self.players[i] for i in rows])
+        rolling = frame.rolling(window, min_periods=1).mean()
+        long = frame.rename_axis("Temporada").reset_index().melt("Temporada", var_name="Player",
+                                                                 value_name="Puntaje")
+        long["Media móvil"] = rolling.to_numpy().T.ravel() if len(rows) else []
+        return long
+
+    def memory_usage(self):
+        with self._lock:
+            return sum(ids.nbytes + scores.nbytes for ids, scores, _ in self._snapshots.values())